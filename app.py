@@ -1,32 +1,109 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response, copy_current_request_context
 import os
+import functools
 import google.generativeai as genai
 from dotenv import load_dotenv
 import secrets
+import socket
 import json
 import random
+import re
 import string
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from datetime import datetime, timedelta
 import logging
 from models import db, migrate, Game, Player, Topic, Question, Answer, Rating
-from sqlalchemy import create_engine, func
-from sqlalchemy.exc import SQLAlchemyError
+from deadline_scheduler import DeadlineScheduler
+from game_mailbox import GameMailboxes
+from game_journal import GameJournal
+from spectator_fanout import SpectatorFanout
+from game_state import GameStateStore, GameState, LeaseUnavailable, PlayerState, SessionIndex, TopicProfile
+from state_backend import create_state_backend
+from question_pool import QuestionPrefetchPool
+from fallback_bank import FallbackQuestionBank
+from uniqueness import UniquenessIndex, UniquenessRegistry
+from question_client import QuestionClient, StreamingQuestionParser
+from question_bank import take_banked_question, bank_question, record_use, evict_expired, bank_stats
+from topic_popularity import record_rating, popular_topics, popularity_stats
+from query_plans import check_query_plans
+from wire_codec import WIRE_EVENT, WIRE_JSON, WIRE_MSGPACK, MeasuredJSON, encode, has_binary_form, negotiate, wire_room, wire_stats
+from sqlalchemy import create_engine, delete, insert, select, update, bindparam, or_
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from tenacity import retry, stop_after_attempt, wait_fixed
-import timeout_decorator
 import threading
+import time
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 RANDOM_TOPICS = ["World history", "Ancient civilizations", "US presidents", "World War II", "The Renaissance", "Science", "Famous scientists", "Space exploration", "Medical breakthroughs", "Astronomy", "Geography", "World capitals", "Famous landmarks", "Natural wonders", "Countries and cultures", "Sports", "Olympic history", "World sports tournaments", "Famous athletes", "Sports records", "Pop culture", "Movies", "Famous movie quotes", "Television", "Iconic TV shows", "Music", "Classical composers", "Pop music hits", "Musical instruments", "Broadway musicals", "Literature", "Classic literature", "Famous authors", "Mythology", "Fairytales and folklore", "Technology", "Inventions that changed the world", "Video game history", "Internet culture", "Famous inventors", "Art", "Famous paintings", "Art movements", "Architecture", "Fashion trends", "Food and cuisine", "Famous chefs", "World cuisines", "Holiday traditions", "Christmas traditions", "Animals", "Animal kingdom", "Dinosaurs", "Endangered species", "Superheroes", "Historical figures", "Famous explorers", "Women in history", "Civil rights movements", "Cold War", "TikTok trends", "AI in social media", "Short-form video", "Influencer marketing", "Social commerce", "Viral memes", "Live shopping events", "Gen Z culture", "Social media challenges", "Creator economy"]
 
+# Normalized once; random topic candidates are drawn from this tuple.
+TOPIC_CATALOG = tuple(dict.fromkeys(t.lower().strip() for t in RANDOM_TOPICS))
+
 PLAYER_EMOJIS = ["🚗", "🐶", "🎩", "🚀", "🦄", "🍕", "🐙", "🐢", "🤖", "🧙‍♂️", "🦁", "✈️", "🧀", "⚽", "🎬", "🐘", "⛵", "🎲", "🦇", "🍔"]
 
-active_timers = {}
-random_click_counters = {}
-recent_random_topics = {}
-unread_messages = {}
+REDIS_URL = os.getenv('REDIS_URL')
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+RECENT_RANDOM_TOPICS = 3
+CHAT_HISTORY = 50
+UNREAD_FLUSH_INTERVAL = 0.5
+pending_unread = set()
+chat_stats = {'messages': 0, 'unread_batches': 0, 'unread_emits': 0}
+state_backend = create_state_backend(REDIS_URL)
+game_activity = {}
+game_states = GameStateStore(state_backend, WORKER_ID, on_load=lambda state: restore_game_state(state), on_flush=lambda state, seq: compact_journal(state, seq))
+sessions = SessionIndex()
+wire_encodings = {}
+# Handlers another worker may relay a game's socket events to, by name.
+relayed_handlers = {}
+relay_stats = {'relayed': 0, 'received': 0, 'forwarded': 0}
+QUESTION_TIME_LIMIT = 30.0
+MAX_PLAYERS = 10
+# Game-wide events an audience sees; roster and score changes reach it through the coalesced view instead.
+SPECTATOR_EVENTS = {'game_started', 'question_ready', 'player_answered', 'round_results', 'game_ended', 'game_reset', 'game_paused', 'turn_skipped', 'chat_message'}
+GAME_STATE_FLUSH_INTERVAL = 5
+INACTIVE_GAME_AGE = timedelta(minutes=2)
+REAPER_INTERVAL = 60
+REAPER_BATCH_SIZE = 100
+REAPER_TIME_BUDGET = 2.0
+reaper_stats = {'passes': 0, 'games': 0, 'topics': 0, 'rows': 0, 'budget_exhausted': 0, 'last_pass_seconds': 0.0, 'max_pass_seconds': 0.0}
+
+PREFETCH_LIKED_TOPICS = 1
+PREFETCH_RANDOM_TOPICS = 1
+PREFETCH_POPULAR_TOPICS = 1
+# Prefetch runs as background generation; more topics than this per turn mostly produces questions nobody picks.
+MAX_PREFETCH_TOPICS = 2
+POPULAR_TOPIC_SHARE = 0.3
+PREFETCH_BUDGET = 45.0
+QUESTIONS_PER_CALL = 3
+MAX_GENERATION_ATTEMPTS = 3
+QUESTION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'question': {'type': 'string'},
+        'answer': {'type': 'string'},
+        'options': {'type': 'array', 'items': {'type': 'string'}, 'min_items': 4, 'max_items': 4},
+        'explanation': {'type': 'string'},
+    },
+    'required': ['question', 'answer', 'options', 'explanation'],
+}
+QUESTION_GENERATION_CONFIG = genai.GenerationConfig(
+    response_mime_type='application/json',
+    response_schema={'type': 'array', 'items': QUESTION_SCHEMA, 'min_items': 1},
+)
+# The live call is streamed without a schema: the SDK's Schema cannot order properties and with one Gemini writes them
+# alphabetically, question last. The prompt fixes the order instead, so a question can go out before its explanation.
+QUESTION_STREAM_CONFIG = genai.GenerationConfig(response_mime_type='application/json')
+QUESTION_LATENCY_BUDGET = float(os.getenv('QUESTION_LATENCY_BUDGET', '6'))
+generation_failures = {}
+hedge_stats = {'live': 0, 'fallback': 0, 'stale': 0, 'errors': 0}
+# The question race in flight per game, so a reset or pause can call it off.
+question_races = {}
+generation_attempts = {}
+question_pool = QuestionPrefetchPool()
+fallback_bank = FallbackQuestionBank()
+uniqueness = UniquenessRegistry(lambda game_id: load_prior_questions(game_id))
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
@@ -57,14 +134,20 @@ with app.app_context():
         logger.error(f"Database connection failed: {str(e)}")
         raise
 
-socketio = SocketIO(app, cors_allowed_origins="*", logger=True, engineio_logger=True, ping_timeout=60)
+socketio = SocketIO(app, cors_allowed_origins="*", logger=True, engineio_logger=True, ping_timeout=60, message_queue=REDIS_URL, json=MeasuredJSON)
+question_deadlines = DeadlineScheduler(socketio.start_background_task)
+game_mailboxes = GameMailboxes(socketio.start_background_task, app.app_context)
+game_journal = GameJournal(os.getenv('GAME_JOURNAL_DIR', os.path.join(app.instance_path, 'journal')))
+# watch_game is relayed like any other game event, so a game's audience is registered on the worker that owns it.
+spectators = SpectatorFanout(socketio.server)
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY not found in environment variables.")
     raise ValueError("GEMINI_API_KEY is required")
-genai.configure(api_key=GEMINI_API_KEY)
+genai.configure(api_key=GEMINI_API_KEY, transport='rest')
+question_client = QuestionClient()
 
 def generate_game_id():
     while True:
@@ -72,18 +155,170 @@ def generate_game_id():
         if not Game.query.filter_by(id=game_id).first():
             return game_id
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+def serialized_by_game(get_game_id):
+    # Runs the view or handler on its game's mailbox, keeping the request context (sid, session) it was called with.
+    # A socket event for a game another worker owns is relayed to that worker instead of pulling the game over here.
+    def decorator(fn):
+        relayed_handlers[fn.__name__] = fn
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            game_id = get_game_id(*args, **kwargs)
+            sid = getattr(request, 'sid', None)
+            owner = game_states.remote_owner(game_id) if sid else None
+            if owner:
+                relay_to_owner(owner, game_id, fn, args, sid)
+                return None
+            try:
+                return game_mailboxes.call(game_id, copy_current_request_context(fn), *args, **kwargs)
+            except LeaseUnavailable:
+                if not sid:
+                    raise
+                socketio.emit('error', {'message': 'Game is busy, please try again'}, to=sid)
+        return wrapper
+    return decorator
+
+def relay_to_owner(owner, game_id, fn, args, sid=None):
+    state_backend.publish({'type': 'event', 'owner': owner, 'worker': WORKER_ID, 'game_id': game_id, 'handler': fn.__name__, 'sid': sid, 'wire': wire_encodings.get(sid), 'args': list(args)})
+    relay_stats['relayed'] += 1
+
+def run_relayed_event(message):
+    game_id = message['game_id']
+    owner = game_states.remote_owner(game_id)
+    if owner:
+        # Handed off while the event was in flight; pass it on rather than taking the game back.
+        message['owner'] = owner
+        state_backend.publish(message)
+        relay_stats['forwarded'] += 1
+        return
+    relay_stats['received'] += 1
+    fn = relayed_handlers[message['handler']]
+    sid = message['sid']
+    if sid is None:
+        return fn(*message['args'])
+    # Emits to the sid and room joins reach the socket's worker through the message queue.
+    wire_encodings.setdefault(sid, message['wire'] or WIRE_JSON)
+    with app.test_request_context('/socket.io/'):
+        request.sid = sid
+        request.namespace = '/'
+        return fn(*message['args'])
+
+def event_game_id(data):
+    return data.get('game_id') if isinstance(data, dict) else None
+
 def update_game_activity(game_id):
-    try:
-        game = Game.query.filter_by(id=game_id).first()
-        if game:
-            game.last_activity = datetime.utcnow()
-            db.session.commit()
-            logger.debug(f"Updated last_activity for game {game_id}")
-    except Exception as e:
-        logger.error(f"Error updating last_activity for game {game_id}: {str(e)}")
-        db.session.rollback()
-        raise
+    # Coalesced in memory; flush_game_activity writes the latest touch per game in one batched UPDATE.
+    game_activity[game_id] = datetime.utcnow()
+
+def journal_event(state, event_type, *fields, players=(), player_fields=(), **extra):
+    # Events carry the resulting values, not deltas, so replay is idempotent; the periodic flush compacts them away.
+    event = {'type': event_type, 'game': {field: getattr(state, field) for field in fields}}
+    if player_fields:
+        event['players'] = {p.username: {field: getattr(p, field) for field in player_fields} for p in players}
+    event.update(extra)
+    state.journal_seq = game_journal.append(state.id, event)
+    return state.journal_seq
+
+def compact_journal(state, seq):
+    # Buffered answers only reach the answers table when the round resolves, so their events must survive compaction.
+    if state.unsaved_answers_seq:
+        seq = min(seq, state.unsaved_answers_seq - 1)
+    game_journal.compact(state.id, seq)
+
+def state_snapshot(state):
+    return {'seq': state.version, 'players': state.usernames(), 'scores': state.scores(), 'player_emojis': state.emojis(), 'connected': {p.username: not p.disconnected for p in state.players}}
+
+def emit_state_delta(state, **changes):
+    # Rosters and scores go out as changes tagged with the game's state version; a client that sees a gap asks for a snapshot.
+    state.version += 1
+    changes['seq'] = state.version
+    emit_to_game(state, 'state_delta', changes)
+
+def spectator_view(state):
+    # What an audience sees between batches; the answer stays hidden until round_results.
+    question = state.current_question
+    current_player = state.player_at(state.current_player_index) if state.status == 'in_progress' else None
+    return dict(state_snapshot(state), status=state.status, current_player=current_player.username if current_player else None, question={'question': question['question'], 'options': question['options'], 'question_id': question['question_id']} if question else None)
+
+def load_spectator_view(game_id):
+    state = game_states.get(game_id)
+    return spectator_view(state) if state else None
+
+def refresh_spectator_view(state):
+    if spectators.watched(state.id):
+        spectators.update_view(state.id, spectator_view(state))
+
+def emit_to_game(state, event, data):
+    # Room events go out once per wire format. The binary copy is skipped only when every connected player is known to use JSON;
+    # a player's format is unknown after a restart or handoff until they rejoin.
+    if has_binary_form(event) and any(p.wire != WIRE_JSON and not p.disconnected for p in state.players):
+        socketio.emit(event, data, room=wire_room(state.id, WIRE_JSON))
+        socketio.emit(WIRE_EVENT, encode(event, data), room=wire_room(state.id, WIRE_MSGPACK))
+    else:
+        socketio.emit(event, data, room=state.id)
+    if spectators.watched(state.id):
+        if event in SPECTATOR_EVENTS:
+            spectators.publish(state.id, event, data)
+        spectators.update_view(state.id, spectator_view(state))
+
+def emit_to_sid(event, data, sid, wire=WIRE_JSON):
+    if wire == WIRE_MSGPACK and has_binary_form(event):
+        socketio.emit(WIRE_EVENT, encode(event, data), to=sid)
+    else:
+        socketio.emit(event, data, to=sid)
+
+def emit_to_player(state, username, event, data):
+    to_sid = player_sid(state, username)
+    if to_sid:
+        emit_to_sid(event, data, to_sid, state.player(username).wire)
+    return to_sid
+
+def flush_game_activity():
+    pending = list(game_activity.items())
+    if not pending:
+        return 0
+    games = Game.__table__
+    db.session.execute(update(games).where(games.c.id == bindparam('game_id')).values(last_activity=bindparam('seen')),
+                       [{'game_id': game_id, 'seen': seen} for game_id, seen in pending])
+    db.session.commit()
+    for game_id, seen in pending:
+        if game_activity.get(game_id) == seen:
+            del game_activity[game_id]
+    return len(pending)
+
+def chat_history(game_id):
+    return [json.loads(entry) for entry in state_backend.recent('chat', game_id)]
+
+def unread_count(history, username, cursor):
+    # Derived from the player's read cursor over the ring buffer, so a missed update never leaves the badge wrong.
+    return sum(1 for entry in history if entry['seq'] > cursor and entry['username'] != username)
+
+def send_unread_counts(game_id):
+    state = game_states.get(game_id)
+    if not state:
+        return
+    history = chat_history(game_id)
+    cursors = state_backend.counts('chat_read', game_id)
+    for player in state.players:
+        if player.disconnected:
+            continue
+        count = unread_count(history, player.username, cursors.get(player.username, 0))
+        if count != player.unread:
+            player.unread = count
+            emit_to_player(state, player.username, 'update_unread_count', {'count': count})
+            chat_stats['unread_emits'] += 1
+
+def flush_unread_counts():
+    while True:
+        socketio.sleep(UNREAD_FLUSH_INTERVAL)
+        if not pending_unread:
+            continue
+        pending = list(pending_unread)
+        pending_unread.clear()
+        loaded = {state.id for state in game_states.loaded()}
+        for game_id in pending:
+            if game_id in loaded:
+                game_mailboxes.post(game_id, send_unread_counts, game_id)
+        chat_stats['unread_batches'] += 1
 
 def get_or_create_topic(topic_name):
     normalized_name = topic_name.lower().strip()
@@ -94,91 +329,99 @@ def get_or_create_topic(topic_name):
         db.session.commit()
     return topic
 
-def get_player_top_topics(game_id, username, limit=3):
-    player = Player.query.filter_by(game_id=game_id, username=username).first()
+def player_profile(state, player):
+    # Loaded with one query the first time a player needs it, then kept current by handle_feedback.
+    if player.profile is None:
+        ratings = db.session.query(Topic.normalized_name, Rating.rating).join(Rating, Rating.topic_id == Topic.id).filter(Rating.game_id == state.id, Rating.player_id == player.id).order_by(Rating.id).all()
+        player.profile = TopicProfile(TOPIC_CATALOG, ratings)
+    return player.profile
+
+def get_player_top_topic_names(game_id, username, limit=3):
+    state = game_states.get(game_id)
+    player = state.player(username) if state else None
     if not player:
         logger.debug(f"No player found for {username} in game {game_id}")
-        return "Enter a topic or click Random Topic"
-    top_topics = (db.session.query(Topic.normalized_name, func.count(Rating.id).label('like_count'))
-                  .join(Rating, Rating.topic_id == Topic.id)
-                  .filter(Rating.game_id == game_id, Rating.player_id == player.id, Rating.rating == 1)
-                  .group_by(Topic.normalized_name)
-                  .order_by(func.count(Rating.id).desc())
-                  .limit(limit)
-                  .all())
-    result = ", ".join([row.normalized_name for row in top_topics]) if top_topics else "Enter a topic or click Random Topic"
+        return []
+    return player_profile(state, player).top(limit)
+
+def get_player_top_topics(game_id, username, limit=3):
+    top_topics = get_player_top_topic_names(game_id, username, limit)
+    result = ", ".join(top_topics) if top_topics else "Enter a topic or click Random Topic"
     logger.debug(f"Top liked topics for {username} in game {game_id}: {result}")
     return result
 
+def get_random_topic_candidates(game_id, username=None):
+    recent = state_backend.recent('recent_topics', game_id)
+    state = game_states.get(game_id)
+    player = state.player(username) if state and username else None
+    if not player:
+        return [t for t in TOPIC_CATALOG if t not in recent], [], [t for t in popular_topics(TOPIC_CATALOG) if t not in recent], False
+    if state.last_topic is None:
+        # Only a freshly loaded game has to ask the database; publish_question keeps it current after that.
+        last_question = db.session.query(Topic.normalized_name).join(Question, Question.topic_id == Topic.id).filter(Question.game_id == game_id).order_by(Question.id.desc()).first()
+        state.last_topic = last_question.normalized_name if last_question else ''
+    profile = player_profile(state, player)
+    logger.debug(f"Game {game_id}: Topic profile for {username}: {profile.counts()}")
+    excluded = set(recent)
+    excluded.add(state.last_topic)
+    candidate_topics = [t for t in profile.candidates if t not in excluded]
+    liked_candidates = [t for t in profile.liked if t not in excluded]
+    popular_candidates = [t for t in popular_topics(TOPIC_CATALOG) if t not in excluded and t not in profile.disliked]
+    return candidate_topics, liked_candidates, popular_candidates, True
+
+def choose_topic(game_id, topics):
+    pooled = [t for t in topics if question_pool.has(game_id, t)]
+    return random.choice(pooled or topics)
+
+def record_random_topic(game_id, username, topic):
+    if username:
+        state_backend.incr('random_clicks', game_id, username)
+    state_backend.push_recent('recent_topics', game_id, topic, RECENT_RANDOM_TOPICS)
+
 def suggest_random_topic(game_id, username=None):
     try:
-        if game_id not in recent_random_topics:
-            recent_random_topics[game_id] = []
-        if game_id not in random_click_counters:
-            random_click_counters[game_id] = {}
-        if username and username not in random_click_counters[game_id]:
-            random_click_counters[game_id][username] = 0
-        last_question = db.session.query(Question.topic_id).filter(Question.game_id == game_id).order_by(Question.id.desc()).first()
-        last_topic = Topic.query.get(last_question.topic_id).normalized_name if last_question else None
-        player = Player.query.filter_by(game_id=game_id, username=username).first()
-        if not player:
+        candidate_topics, liked_candidates, popular_candidates, has_player = get_random_topic_candidates(game_id, username)
+        if not has_player:
             logger.debug(f"No player found for {username} in game {game_id}, using fallback topics")
-            candidate_topics = [t.lower().strip() for t in RANDOM_TOPICS if t.lower().strip() not in recent_random_topics[game_id]]
-            topic = random.choice(candidate_topics or RANDOM_TOPICS)
-            if username:
-                random_click_counters[game_id][username] += 1
-            recent_random_topics[game_id].append(topic)
-            if len(recent_random_topics[game_id]) > 3:
-                recent_random_topics[game_id].pop(0)
+            topic = choose_topic(game_id, candidate_topics or TOPIC_CATALOG)
+            record_random_topic(game_id, username, topic)
             logger.debug(f"Game {game_id}: Suggested random topic '{topic}' for {username or 'unknown'}")
             return topic
-        liked_topics = db.session.query(Topic.normalized_name).join(Rating, Rating.topic_id == Topic.id).filter(Rating.game_id == game_id, Rating.player_id == player.id, Rating.rating == 1).group_by(Topic.normalized_name).all()
-        disliked_topics = db.session.query(Topic.normalized_name).join(Rating, Rating.topic_id == Topic.id).filter(Rating.game_id == game_id, Rating.player_id == player.id, Rating.rating == 0).group_by(Topic.normalized_name).all()
-        liked_topic_names = [t.normalized_name for t in liked_topics]
-        disliked_topic_names = [t.normalized_name for t in disliked_topics]
-        logger.debug(f"Game {game_id}: Liked topics for {username}: {liked_topic_names}")
-        logger.debug(f"Game {game_id}: Disliked topics for {username}: {disliked_topic_names}")
-        logger.debug(f"Game {game_id}: Random click count for {username}: {random_click_counters[game_id][username]}")
-        candidate_topics = [t.lower().strip() for t in RANDOM_TOPICS if t.lower().strip() not in disliked_topic_names]
-        candidate_topics = [t for t in candidate_topics if t not in recent_random_topics[game_id] and t != (last_topic or "")]
-        click_count = random_click_counters[game_id][username]
-        use_liked = click_count > 0 and click_count % 5 == 0 and liked_topic_names and random.random() < 0.6
+        click_count = state_backend.count('random_clicks', game_id, username)
+        logger.debug(f"Game {game_id}: Random click count for {username}: {click_count}")
+        use_liked = click_count > 0 and click_count % 5 == 0 and liked_candidates and random.random() < 0.6
         if use_liked:
-            liked_candidates = [t for t in liked_topic_names if t not in recent_random_topics[game_id] and t != (last_topic or "")]
-            if liked_candidates:
-                topic = random.choice(liked_candidates)
-                logger.debug(f"Game {game_id}: Selected liked topic '{topic}' for {username} on click {click_count}")
-            else:
-                topic = random.choice(candidate_topics or RANDOM_TOPICS)
-                logger.debug(f"Game {game_id}: No available liked topics, using random '{topic}' for {username}")
+            topic = choose_topic(game_id, liked_candidates)
+            logger.debug(f"Game {game_id}: Selected liked topic '{topic}' for {username} on click {click_count}")
+        elif popular_candidates and random.random() < POPULAR_TOPIC_SHARE:
+            topic = choose_topic(game_id, popular_candidates)
+            logger.debug(f"Game {game_id}: Selected popular topic '{topic}' for {username}")
         else:
-            topic = random.choice(candidate_topics or RANDOM_TOPICS)
+            topic = choose_topic(game_id, candidate_topics or TOPIC_CATALOG)
             logger.debug(f"Game {game_id}: Selected random topic '{topic}' for {username}")
-        random_click_counters[game_id][username] += 1
-        recent_random_topics[game_id].append(topic)
-        if len(recent_random_topics[game_id]) > 3:
-            recent_random_topics[game_id].pop(0)
+        record_random_topic(game_id, username, topic)
         return topic
     except Exception as e:
         logger.error(f"Error fetching random topic for game {game_id}, user {username}: {str(e)}")
         db.session.rollback()
-        topic = random.choice([t.lower().strip() for t in RANDOM_TOPICS])
-        if username:
-            random_click_counters[game_id][username] += 1
-        recent_random_topics[game_id].append(topic)
-        if len(recent_random_topics[game_id]) > 3:
-            recent_random_topics[game_id].pop(0)
+        topic = random.choice(TOPIC_CATALOG)
+        record_random_topic(game_id, username, topic)
         return topic
 
-@timeout_decorator.timeout(10, timeout_exception=TimeoutError)
-def get_trivia_question(topic, game_id):
-    try:
-        prior_questions = Question.query.filter_by(game_id=game_id).all()
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        prior_questions_list = [f"- Question: {q.question_text} (Answer: {q.answer_text})" for q in prior_questions]
-        prior_questions_str = "\n".join(prior_questions_list[:10]) if prior_questions_list else "None"
-        prompt = f"""
-        As an expert in crafting engaging and addictive trivia questions, your task is to generate a trivia question about "{topic}" that is both entertaining and informative. The question should spark curiosity, delight players, and have a single, definitive answer.  
+def load_prior_questions(game_id):
+    return db.session.query(Question.question_text, Question.answer_text).filter(Question.game_id == game_id).order_by(Question.id).all()
+
+def find_duplicate(question_data, indexes):
+    for index in indexes:
+        reason = index.conflict(question_data['question'], question_data['answer'])
+        if reason:
+            return reason
+    return None
+
+def build_question_prompt(topic, prior_questions_str, count=1):
+    questions_phrase = "a trivia question" if count == 1 else f"{count} distinct trivia questions"
+    return f"""
+        As an expert in crafting engaging and addictive trivia questions, your task is to generate {questions_phrase} about "{topic}" that is both entertaining and informative. Each question should spark curiosity, delight players, and have a single, definitive answer.  
         
         ### **Requirements:**  
         - **Engaging & Fun:** Craft a question that’s exciting, playful, and just challenging enough to keep players hooked. Use a fun fact, a quirky angle, or a lighthearted vibe to make it pop.  
@@ -186,214 +429,481 @@ def get_trivia_question(topic, game_id):
         - **Relevant & Fresh:** Focus on modern times unless the topic is historical. Steer clear of stale or overused trivia ideas.  
         - **Factually Accurate & Unambiguous:** Make sure the question is correct, based on real details about "{topic}", and has one obvious answer. No vague, misleading, or made-up content.  
         - **No Direct Hints:** Keep the correct answer (or similar words) out of the question itself.  
-        - **Completely Unique (Critical):** The question and answer MUST be distinct from any prior ones in this game. If the topic repeats (e.g., "{topic}"), reusing themes or keywords is fine, but the question and answer must be new and different. Prior questions and answers:  
+        - **Completely Unique (Critical):** Every question and answer MUST be distinct from any prior ones in this game and from each other. If the topic repeats (e.g., "{topic}"), reusing themes or keywords is fine, but the question and answer must be new and different. Prior questions and answers:  
           {prior_questions_str}  
         - **Multiple Choice Options:** Provide four answer choices—one correct, three wrong but believable. Distractors should be solid, topic-related, and not too tricky.  
         - **Interesting Explanation:** Include a 1-2 sentence explanation with a fun, factual tidbit about "{topic}" to keep players smiling.  
           
-        ### **Response Format (JSON):**  
+        ### **Response Format (JSON array of {count}):**  
+        Write the keys of each object in exactly this order: "question", "answer", "options", "explanation".  
         ```json  
-        {{  
-          "question": "string",  
-          "answer": "string",  
-          "options": ["string", "string", "string", "string"],  
-          "explanation": "string"  
-        }}  
+        [
+          {{  
+            "question": "string",  
+            "answer": "string",  
+            "options": ["string", "string", "string", "string"],  
+            "explanation": "string"  
+          }}  
+        ]
         """
-        for attempt in range(8):
+
+def validate_question_data(question_data, indexes, require_explanation=True):
+    if not isinstance(question_data, dict):
+        return 'not_object'
+    required_fields = ["question", "answer", "options", "explanation"] if require_explanation else ["question", "answer", "options"]
+    missing_fields = [field for field in required_fields if field not in question_data or not question_data[field]]
+    if missing_fields:
+        return 'missing_fields'
+    if not all(isinstance(question_data.get(field, ''), str) for field in ["question", "answer", "explanation"]):
+        return 'wrong_field_type'
+    options = question_data["options"]
+    if not isinstance(options, list) or not all(isinstance(o, str) and o.strip() for o in options) or len(set(options)) != 4:
+        return 'bad_options'
+    if question_data["answer"] not in options:
+        return 'answer_not_in_options'
+    if find_duplicate(question_data, indexes):
+        return 'similar'
+    return None
+
+def record_generation_failure(reason):
+    generation_failures[reason] = generation_failures.get(reason, 0) + 1
+
+def parse_question_batch(text):
+    fenced = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text.strip(), re.DOTALL)
+    data = json.loads(fenced.group(1) if fenced else text)
+    if isinstance(data, dict):
+        data = data.get('questions', [data])
+    return data if isinstance(data, list) else [data]
+
+def stream_first_question(prompt, deadline, indexes, on_ready):
+    # Hands the first item to on_ready as soon as its question, answer and options have arrived and pass validation.
+    parser = StreamingQuestionParser()
+    streamed = None
+    checked = False
+    try:
+        for text in question_client.stream(prompt, deadline, generation_config=QUESTION_STREAM_CONFIG):
+            fields = parser.feed(text)
+            if checked or not all(field in fields for field in ('question', 'answer', 'options')):
+                continue
+            checked = True
+            candidate = {'question': fields['question'], 'answer': fields['answer'], 'options': fields['options']}
+            reason = validate_question_data(candidate, indexes, require_explanation=False)
+            if reason:
+                record_generation_failure(reason)
+                logger.debug(f"Streamed question not usable early: {reason}")
+                continue
+            random.shuffle(candidate['options'])
+            candidate['explanation'] = ''
+            candidate['is_fallback'] = False
+            streamed = candidate
+            on_ready(dict(candidate))
+    except Exception as e:
+        if streamed is None:
+            raise
+        logger.warning(f"Stream ended early after question was published: {str(e)}")
+    if streamed is not None and isinstance(parser.fields.get('explanation'), str):
+        streamed['explanation'] = parser.fields['explanation']
+    return parser.buffer, streamed
+
+def get_trivia_questions(topic, game_id, count=QUESTIONS_PER_CALL, budget=None, background=False, on_ready=None):
+    deadline = question_client.deadline(budget)
+    try:
+        game_index = uniqueness.get(game_id)
+        batch_index = UniquenessIndex()
+        prompt = build_question_prompt(topic, game_index.digest(), count)
+        for attempt in range(MAX_GENERATION_ATTEMPTS):
             try:
-                response = model.generate_content(prompt)
-                cleaned_text = response.text.strip().replace('json', '').replace('```', '').strip()
+                streamed = None
+                if on_ready:
+                    response_text, streamed = stream_first_question(prompt, deadline, (game_index, batch_index), on_ready)
+                else:
+                    response_text = question_client.generate(prompt, deadline, background=background, generation_config=QUESTION_GENERATION_CONFIG).text
                 try:
-                    question_data = json.loads(cleaned_text)
+                    items = parse_question_batch(response_text)
                 except json.JSONDecodeError as e:
-                    logger.error(f"Attempt {attempt + 1}/8: JSON parsing failed for topic {topic}: {str(e)}. Raw response: {cleaned_text}")
-                    if attempt == 7:
+                    record_generation_failure('json')
+                    logger.error(f"Attempt {attempt + 1}/{MAX_GENERATION_ATTEMPTS}: JSON parsing failed for topic {topic}: {str(e)}. Raw response: {response_text}")
+                    if streamed:
+                        return [streamed]
+                    if attempt == MAX_GENERATION_ATTEMPTS - 1:
                         raise
                     continue
-                required_fields = ["question", "answer", "options", "explanation"]
-                missing_fields = [field for field in required_fields if field not in question_data or not question_data[field]]
-                if missing_fields:
-                    logger.error(f"Attempt {attempt + 1}/8: Missing fields {missing_fields} in response for topic {topic}: {question_data}")
-                    if attempt == 7:
-                        raise ValueError(f"Invalid response format: missing {missing_fields}")
-                    continue
-                if not isinstance(question_data["options"], list) or len(set(question_data["options"])) != 4:
-                    logger.error(f"Attempt {attempt + 1}/8: Invalid options format for topic {topic}: {question_data['options']}")
-                    if attempt == 7:
-                        raise ValueError("Options must be a list of 4 unique items")
-                    continue
-                is_similar = False
-                for q in prior_questions:
-                    if (q.question_text.lower() == question_data['question'].lower() or 
-                        q.answer_text.lower() == question_data['answer'].lower() or 
-                        q.answer_text.lower() in question_data['answer'].lower() or 
-                        question_data['answer'].lower() in q.answer_text.lower()):
-                        logger.warning(f"Attempt {attempt + 1}/8: Similarity detected for topic {topic}: {question_data['question']}")
-                        is_similar = True
-                        break
-                if is_similar:
-                    if attempt == 7:
-                        raise ValueError("Unable to generate a unique question after 8 attempts")
+                accepted = []
+                if streamed:
+                    batch_index.add(streamed['question'], streamed['answer'])
+                    accepted.append(streamed)
+                    items = items[1:]
+                for index, question_data in enumerate(items[:count - len(accepted)]):
+                    reason = validate_question_data(question_data, (game_index, batch_index))
+                    if reason:
+                        record_generation_failure(reason)
+                        logger.warning(f"Attempt {attempt + 1}/{MAX_GENERATION_ATTEMPTS}: Discarded item {index + 1}/{len(items)} for topic {topic}: {reason} {question_data}")
+                        continue
+                    random.shuffle(question_data["options"])
+                    question_data["is_fallback"] = False
+                    batch_index.add(question_data['question'], question_data['answer'])
+                    accepted.append(question_data)
+                if not accepted:
+                    if attempt == MAX_GENERATION_ATTEMPTS - 1:
+                        raise ValueError(f"Unable to generate a valid, unique question after {MAX_GENERATION_ATTEMPTS} attempts")
                     continue
-                random.shuffle(question_data["options"])
-                question_data["is_fallback"] = False
-                logger.debug(f"Game {game_id}: Generated unique question '{question_data['question']}' for topic '{topic}' on attempt {attempt + 1}")
-                return question_data
+                generation_attempts[attempt + 1] = generation_attempts.get(attempt + 1, 0) + 1
+                logger.debug(f"Game {game_id}: Generated {len(accepted)}/{count} unique questions for topic '{topic}' on attempt {attempt + 1}")
+                return accepted
             except Exception as e:
-                logger.error(f"Attempt {attempt + 1}/8 failed for topic {topic}: {str(e)}")
-                if attempt == 7:
+                if isinstance(e, TimeoutError):
+                    record_generation_failure('timeout')
+                elif not isinstance(e, ValueError):
+                    record_generation_failure('api_error')
+                logger.error(f"Attempt {attempt + 1}/{MAX_GENERATION_ATTEMPTS} failed for topic {topic}: {str(e)}")
+                if attempt == MAX_GENERATION_ATTEMPTS - 1 or time.monotonic() >= deadline:
                     raise
     except Exception as e:
-        logger.error(f"Failed to generate unique question for topic {topic} after 8 attempts: {str(e)}")
+        record_generation_failure('exhausted')
+        logger.error(f"Failed to generate unique question for topic {topic}: {str(e)}")
         raise ValueError(f"Could not generate a unique question for '{topic}'. Please try a different topic.")
 
+def fetch_question(topic, game_id, budget=None, background=False, on_ready=None):
+    # Runs outside the game's mailbox, so it must not load the game or pull it back from another worker.
+    state = game_states.owned(game_id)
+    if state is None:
+        raise ValueError(f"Game {game_id} is no longer hosted here")
+    usernames = state.usernames()
+    game_index = uniqueness.get(game_id)
+    question_data = take_banked_question(topic, usernames, lambda q: find_duplicate(q, (game_index,)))
+    if question_data:
+        logger.debug(f"Game {game_id}: Served banked question for topic '{topic}'")
+        return question_data
+    question_data, *surplus = get_trivia_questions(topic, game_id, QUESTIONS_PER_CALL, budget, background, on_ready)
+    try:
+        question_data['bank_id'] = bank_question(topic, question_data)
+        for extra in surplus:
+            bank_question(topic, extra)
+        if surplus:
+            logger.debug(f"Game {game_id}: Parked {len(surplus)} surplus questions for topic '{topic}'")
+    except SQLAlchemyError as e:
+        logger.error(f"Game {game_id}: Failed to bank question for topic '{topic}': {str(e)}")
+        db.session.rollback()
+    return question_data
+
+def get_prefetch_topics(game_id, username, random_count=PREFETCH_RANDOM_TOPICS):
+    topics = get_player_top_topic_names(game_id, username, PREFETCH_LIKED_TOPICS)
+    candidate_topics, _, popular_candidates, _ = get_random_topic_candidates(game_id, username)
+    topics += [t for t in popular_candidates if t not in topics][:PREFETCH_POPULAR_TOPICS]
+    random.shuffle(candidate_topics)
+    topics += [t for t in candidate_topics if t not in topics][:random_count]
+    return topics[:MAX_PREFETCH_TOPICS]
+
+def prefetch_questions(game_id, topics):
+    with app.app_context():
+        for topic in topics:
+            if not question_pool.claim(game_id, topic):
+                continue
+            try:
+                state = game_states.owned(game_id)
+                if not state or state.status != 'in_progress':
+                    logger.debug(f"Game {game_id}: Stopping prefetch, the game ended or moved to another worker")
+                    return
+                question_data = fetch_question(topic, game_id, budget=PREFETCH_BUDGET, background=True)
+                if game_states.owned(game_id) is None:
+                    # Handed off during the Gemini call: the question stays banked and nothing is kept here for the game.
+                    uniqueness.evict_game(game_id)
+                    return
+                question_pool.put(game_id, topic, question_data)
+                logger.debug(f"Game {game_id}: Prefetched question for topic '{topic}'")
+            except Exception as e:
+                logger.warning(f"Game {game_id}: Prefetch failed for topic '{topic}': {str(e)}")
+                db.session.rollback()
+            finally:
+                question_pool.release(game_id, topic)
+
+def schedule_prefetch(game_id, username):
+    try:
+        topics = get_prefetch_topics(game_id, username)
+    except SQLAlchemyError as e:
+        logger.error(f"Game {game_id}: Could not pick prefetch topics for {username}: {str(e)}")
+        db.session.rollback()
+        return
+    if topics:
+        logger.debug(f"Game {game_id}: Prefetching questions for {username}: {topics}")
+        socketio.start_background_task(prefetch_questions, game_id, topics)
+
+def take_prefetched_question(game_id, topic):
+    question_data = question_pool.take(game_id, topic)
+    if question_data is None:
+        logger.debug(f"Game {game_id}: Prefetch miss for topic '{topic}'")
+        return None
+    if find_duplicate(question_data, (uniqueness.get(game_id),)):
+        logger.debug(f"Game {game_id}: Discarded prefetched question for '{topic}' as no longer unique")
+        return None
+    logger.debug(f"Game {game_id}: Prefetch hit for topic '{topic}'")
+    return question_data
+
 def get_next_active_player(game_id):
-    game = Game.query.filter_by(id=game_id).first()
-    if not game:
+    state = game_states.get(game_id)
+    if not state:
         return None
-    active_players = Player.query.filter_by(game_id=game_id, disconnected=False).order_by(Player.id).all()
+    active_players = state.active_players()
     if not active_players:
         return None
-    current_index = game.current_player_index
+    current_index = state.current_player_index
     num_players = len(active_players)
     for _ in range(num_players):
         current_index = (current_index + 1) % num_players
         next_player = active_players[current_index]
         if not next_player.disconnected:
-            game.current_player_index = current_index
-            db.session.commit()
+            state.current_player_index = current_index
+            state.touch()
+            journal_event(state, 'turn_changed', 'current_player_index')
             update_game_activity(game_id)
             return next_player
     return None
 
+def load_round_answers(game_id, question_id):
+    rows = db.session.query(Answer.player_id, Answer.answer).filter_by(game_id=game_id, question_id=question_id).all()
+    return {player_id: answer for player_id, answer in rows}
+
+def save_round_answers(state, backfill=False):
+    # One executemany per round instead of a commit per answer; backfill writes None for connected players who never answered.
+    question_id = state.current_question['question_id']
+    if backfill:
+        for p in state.active_players():
+            state.answers.setdefault(p.id, None)
+    for attempt in range(2):
+        rows = [{'game_id': state.id, 'player_id': player_id, 'question_id': question_id, 'answer': answer} for player_id, answer in state.answers.items()]
+        new_rows = [row for row in rows if row['player_id'] not in state.saved_answers]
+        saved_rows = [dict(row, b_player_id=row['player_id']) for row in rows if row['player_id'] in state.saved_answers]
+        try:
+            if new_rows:
+                db.session.execute(insert(Answer.__table__), new_rows)
+            if saved_rows:
+                table = Answer.__table__
+                db.session.execute(update(table).where(table.c.game_id == bindparam('game_id'), table.c.player_id == bindparam('b_player_id'), table.c.question_id == bindparam('question_id')).values(answer=bindparam('answer')), saved_rows)
+            db.session.commit()
+            state.saved_answers.update(state.answers)
+            state.unsaved_answers_seq = 0
+            return len(rows)
+        except IntegrityError:
+            # Rows written before a handoff or crash; update those instead.
+            db.session.rollback()
+            state.saved_answers.update(load_round_answers(state.id, question_id))
+            logger.debug(f"Game {state.id}: Some answers for question_id {question_id} were already stored, retrying")
+    return 0
+
 def process_round_results(game_id):
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game or not game.current_question:
+        state = game_states.get(game_id)
+        if not state or not state.current_question:
             logger.debug(f"Game {game_id}: No game or question to process")
             return
-        current_question_id = game.current_question['question_id']
-        active_players = Player.query.filter_by(game_id=game_id, disconnected=False).all()
-        correct_answer = game.current_question['answer']
-        is_fallback = game.current_question.get('is_fallback', False)
+        current_question_id = state.current_question['question_id']
+        correct_answer = state.current_question['answer']
+        is_fallback = state.current_question.get('is_fallback', False)
+        save_round_answers(state, backfill=True)
+        answers = state.answers
         correct_players = []
         if not is_fallback:
-            correct_players = [p for p in active_players if Answer.query.filter_by(game_id=game_id, player_id=p.id, question_id=current_question_id).first() and Answer.query.filter_by(game_id=game_id, player_id=p.id, question_id=current_question_id).first().answer == correct_answer]
+            correct_players = [p for p in state.active_players() if p.id in answers and answers[p.id] == correct_answer]
             for p in correct_players:
                 p.score += 1
-        db.session.commit()
-        max_score = max([p.score for p in Player.query.filter_by(game_id=game_id).all()] + [0])
-        current_question = Question.query.filter_by(id=current_question_id).first()
+        state.touch()
+        journal_event(state, 'round_resolved', players=correct_players, player_fields=('score',), question_id=current_question_id)
+        if correct_players:
+            emit_state_delta(state, scores={p.username: p.score for p in correct_players})
+        scores = state.scores()
+        max_score = max(list(scores.values()) + [0])
         logger.debug(f"Game {game_id}: Processed results for question_id {current_question_id}, max_score: {max_score}")
         if max_score >= 10:
-            socketio.emit('game_ended', {'scores': {p.username: p.score for p in Player.query.filter_by(game_id=game_id).all()}, 'player_emojis': {p.username: p.emoji for p in Player.query.filter_by(game_id=game_id).all()}}, room=game_id)
+            cancel_question_race(game_id)
+            emit_to_game(state, 'game_ended', {'scores': scores, 'player_emojis': state.emojis()})
         else:
             next_player = get_next_active_player(game_id)
             if next_player:
-                socketio.emit('round_results', {'correct_answer': correct_answer, 'explanation': game.current_question['explanation'], 'player_answers': {p.username: Answer.query.filter_by(game_id=game_id, player_id=p.id, question_id=current_question_id).first().answer if Answer.query.filter_by(game_id=game_id, player_id=p.id, question_id=current_question_id).first() else None for p in Player.query.filter_by(game_id=game_id).all()}, 'correct_players': [p.username for p in correct_players], 'next_player': next_player.username, 'scores': {p.username: p.score for p in Player.query.filter_by(game_id=game_id).all()}, 'player_emojis': {p.username: p.emoji for p in Player.query.filter_by(game_id=game_id).all()}, 'question_id': current_question.id, 'topic_id': current_question.topic_id, 'is_fallback': is_fallback}, room=game_id)
-                socketio.emit('request_feedback', {'topic_id': current_question.topic_id}, room=game_id)
-                game.current_question = None
-                db.session.commit()
+                topic_id = db.session.query(Question.topic_id).filter_by(id=current_question_id).scalar()
+                emit_to_game(state, 'round_results', {'correct_answer': correct_answer, 'explanation': state.current_question['explanation'], 'player_answers': {p.username: answers.get(p.id) for p in state.players}, 'correct_players': [p.username for p in correct_players], 'next_player': next_player.username, 'question_id': current_question_id, 'topic_id': topic_id, 'is_fallback': is_fallback})
+                socketio.emit('request_feedback', {'topic_id': topic_id}, room=game_id)
+                state.current_question = None
+                journal_event(state, 'question_cleared', 'current_question')
+                refresh_spectator_view(state)
                 logger.debug(f"Game {game_id}: Emitted round_results, cleared current_question")
                 update_game_activity(game_id)
+                schedule_prefetch(game_id, next_player.username)
+
+def restore_game_state(state):
+    # Rebuild whatever the tables have not caught up with yet, then re-arm the round that was running.
+    if state.current_question:
+        state.answers = load_round_answers(state.id, state.current_question['question_id'])
+        state.saved_answers = set(state.answers)
+    events = game_journal.replay(state.id)
+    for event in events:
+        question_id = state.current_question and state.current_question.get('question_id')
+        state.apply(event)
+        if (state.current_question and state.current_question.get('question_id')) != question_id:
+            state.new_round()
+        if event['type'] == 'answer_submitted' and question_id and event['question_id'] == question_id:
+            state.answers[event['player_id']] = event['answer']
+            state.unsaved_answers_seq = state.unsaved_answers_seq or event['seq']
+    if events:
+        logger.info(f"Game {state.id}: Replayed {len(events)} journal events")
+    resume_question_deadline(state)
+
+def recover_journaled_games():
+    # Games that were live when this worker stopped resume their rounds without waiting for a client to reconnect.
+    for game_id in game_journal.games():
+        try:
+            if not game_mailboxes.call(game_id, game_states.get, game_id):
+                game_journal.drop(game_id)
+        except Exception as e:
+            logger.error(f"Game {game_id}: Failed to recover from journal: {str(e)}")
+
+def resume_question_deadline(state):
+    # A game loaded mid-question (restart or handoff from another worker) still needs its round to end.
+    if state.status != 'in_progress' or not state.current_question or not state.question_start_time:
+        return
+    remaining = QUESTION_TIME_LIMIT - (datetime.utcnow() - state.question_start_time).total_seconds()
+    question_deadlines.schedule(state.id, max(remaining, 0), game_mailboxes.post, state.id, question_timer, state.id)
+    logger.debug(f"Game {state.id}: Resumed question deadline with {max(remaining, 0):.1f}s left")
+
+def handle_state_message(message):
+    # The single listener for every game: anything that can block goes onto the game's mailbox or its own task.
+    game_id = message.get('game_id')
+    if message.get('type') == 'event':
+        if message['owner'] == WORKER_ID:
+            game_mailboxes.post(game_id, run_relayed_event, message)
+        return
+    if message.get('type') == 'disconnected':
+        if message['worker'] != WORKER_ID:
+            socketio.start_background_task(release_sid, message['sid'])
+        return
+    if message.get('to') == WORKER_ID or game_id not in {state.id for state in game_states.loaded()}:
+        return
+    game_mailboxes.post(game_id, hand_off_game, game_id)
+
+def hand_off_game(game_id):
+    question_deadlines.cancel(game_id)
+    cancel_question_race(game_id)
+    question_pool.evict_game(game_id)
+    uniqueness.evict_game(game_id)
+    state = game_states.get(game_id)
+    if state and state.current_question and state.answers:
+        # The next owner rebuilds the round's answers from the table.
+        save_round_answers(state)
+    game_states.hand_off(game_id)
+    # Only once the lease is released, so re-watching reaches the new owner.
+    spectators.hand_off(game_id)
 
 def question_timer(game_id):
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game or game.status != 'in_progress' or not game.current_question:
+        state = game_states.get(game_id)
+        if not state or state.status != 'in_progress' or not state.current_question:
             logger.debug(f"Game {game_id}: Timer aborted - invalid state")
-            if game_id in active_timers:
-                del active_timers[game_id]
             return
-        logger.debug(f"Game {game_id}: 30s timer expired for question_id {game.current_question['question_id']}")
-        active_players = Player.query.filter_by(game_id=game_id, disconnected=False).all()
-        current_question_id = game.current_question['question_id']
-        for player in active_players:
-            if not Answer.query.filter_by(game_id=game_id, player_id=player.id, question_id=current_question_id).first():
-                new_answer = Answer(game_id=game_id, player_id=player.id, question_id=current_question_id, answer=None)
-                db.session.add(new_answer)
-        db.session.commit()
+        logger.debug(f"Game {game_id}: 30s timer expired for question_id {state.current_question['question_id']}")
         process_round_results(game_id)
-        if game_id in active_timers:
-            del active_timers[game_id]
-            logger.debug(f"Game {game_id}: Timer completed and removed")
+        logger.debug(f"Game {game_id}: Timer completed")
 
-def cleanup_inactive_games():
+def flush_game_states():
     while True:
         try:
             with app.app_context():
-                now = datetime.utcnow()
-                inactive_threshold = now - timedelta(minutes=2)
-
-                # Clean up inactive games
-                inactive_games = Game.query.filter(Game.last_activity < inactive_threshold).all()
-                for game in inactive_games:
-                    if game.id in active_timers:
-                        active_timers[game.id].cancel()
-                        del active_timers[game.id]
-                    db.session.delete(game)
-                    db.session.commit()
-                    logger.info(f"Cleaned up inactive game {game.id}")
-                    if game.id in recent_random_topics:
-                        del recent_random_topics[game.id]
-                    if game.id in random_click_counters:
-                        del random_click_counters[game.id]
-                    if game.id in unread_messages:
-                        del unread_messages[game.id]
-
-                # Clean up inactive topics
-                active_game_ids = [game.id for game in Game.query.filter(Game.last_activity >= inactive_threshold).all()]
-                
-                # Find topics that have no questions or ratings
-                inactive_topics = Topic.query.outerjoin(Question, Topic.id == Question.topic_id)\
-                                            .outerjoin(Rating, Topic.id == Rating.topic_id)\
-                                            .filter(Question.id.is_(None), Rating.id.is_(None))\
-                                            .all()
-
-                # Also check topics that have questions or ratings but are no longer active
-                all_topics = Topic.query.all()
-                for topic in all_topics:
-                    # Skip if already identified as inactive (no questions or ratings)
-                    if topic in inactive_topics:
-                        continue
+                flushed = game_states.flush_dirty()
+                if flushed:
+                    logger.debug(f"Flushed {flushed} dirty game states")
+                game_states.renew_leases()
+                touched = flush_game_activity()
+                if touched:
+                    logger.debug(f"Flushed last_activity for {touched} games")
+        except Exception as e:
+            logger.error(f"Error in flush_game_states: {str(e)}")
+            db.session.rollback()
+        socketio.sleep(GAME_STATE_FLUSH_INTERVAL)
 
-                    # Check the most recent question timestamp for this topic
-                    last_question_time = db.session.query(func.max(Question.timestamp))\
-                                                  .filter(Question.topic_id == topic.id)\
-                                                  .scalar() or datetime.min
-
-                    # Check if the topic has ratings tied to active games
-                    has_active_ratings = db.session.query(Rating)\
-                                                  .join(Game, Rating.game_id == Game.id)\
-                                                  .filter(Rating.topic_id == topic.id, Game.last_activity >= inactive_threshold)\
-                                                  .count() > 0
-
-                    # Check if the topic has questions tied to active games
-                    has_active_questions = db.session.query(Question)\
-                                                    .filter(Question.topic_id == topic.id, Question.game_id.in_(active_game_ids))\
-                                                    .count() > 0
-
-                    # A topic is considered inactive if:
-                    # 1. Its last question is older than 2 minutes (if it has questions)
-                    # 2. It has no ratings tied to active games
-                    # 3. It has no questions tied to active games
-                    if (last_question_time < inactive_threshold and not has_active_ratings and not has_active_questions):
-                        inactive_topics.append(topic)
-
-                # Delete inactive topics
-                for topic in inactive_topics:
-                    db.session.delete(topic)
-                    logger.info(f"Cleaned up inactive topic: {topic.normalized_name} (ID: {topic.id})")
+def forget_game(game_id):
+    question_deadlines.cancel(game_id)
+    cancel_question_race(game_id)
+    game_states.discard(game_id)
+    game_journal.drop(game_id)
+    spectators.drop_game(game_id)
+    pending_unread.discard(game_id)
+    sessions.evict_game(game_id)
+    question_pool.evict_game(game_id)
+    uniqueness.evict_game(game_id)
+    state_backend.drop_game(game_id)
+    game_activity.pop(game_id, None)
 
-                db.session.commit()
+def reap_inactive_games(inactive_threshold):
+    game_ids = [row.id for row in db.session.query(Game.id).filter(Game.last_activity < inactive_threshold).limit(REAPER_BATCH_SIZE).all()]
+    if not game_ids:
+        return 0, 0
+    rows = 0
+    # Children first: bulk deletes bypass the ORM cascades declared on Game.
+    for model, column in ((Answer, Answer.game_id), (Rating, Rating.game_id), (Question, Question.game_id), (Player, Player.game_id), (Game, Game.id)):
+        rows += db.session.execute(delete(model).where(column.in_(game_ids))).rowcount
+    db.session.commit()
+    for game_id in game_ids:
+        forget_game(game_id)
+    logger.info(f"Cleaned up {len(game_ids)} inactive games: {', '.join(game_ids)}")
+    return len(game_ids), rows
+
+def reap_inactive_topics(inactive_threshold):
+    # A topic is inactive when no question is recent or belongs to an active game, and no rating belongs to an active game.
+    active_games = select(Game.id).where(Game.last_activity >= inactive_threshold)
+    live_question = select(Question.id).where(Question.topic_id == Topic.id, or_(Question.timestamp >= inactive_threshold, Question.game_id.in_(active_games)))
+    live_rating = select(Rating.id).where(Rating.topic_id == Topic.id, Rating.game_id.in_(active_games))
+    topic_ids = [row.id for row in db.session.query(Topic.id).filter(~live_question.exists(), ~live_rating.exists()).limit(REAPER_BATCH_SIZE).all()]
+    if not topic_ids:
+        return 0, 0
+    rows = db.session.execute(delete(Answer).where(Answer.question_id.in_(select(Question.id).where(Question.topic_id.in_(topic_ids))))).rowcount
+    for model, column in ((Question, Question.topic_id), (Rating, Rating.topic_id), (Topic, Topic.id)):
+        rows += db.session.execute(delete(model).where(column.in_(topic_ids))).rowcount
+    db.session.commit()
+    logger.info(f"Cleaned up {len(topic_ids)} inactive topics")
+    return len(topic_ids), rows
+
+def run_reaper_pass():
+    started = time.monotonic()
+    # Reap against the freshest activity, not whatever the last periodic flush wrote.
+    flush_game_activity()
+    now = datetime.utcnow()
+    inactive_threshold = now - INACTIVE_GAME_AGE
+    for kind, reap in (('games', reap_inactive_games), ('topics', reap_inactive_topics)):
+        while True:
+            reaped, rows = reap(inactive_threshold)
+            reaper_stats[kind] += reaped
+            reaper_stats['rows'] += rows
+            if reaped < REAPER_BATCH_SIZE:
+                break
+            if time.monotonic() - started > REAPER_TIME_BUDGET:
+                reaper_stats['budget_exhausted'] += 1
+                logger.warning(f"Reaper pass hit its {REAPER_TIME_BUDGET}s budget while cleaning {kind}; resuming next pass")
+                break
+            socketio.sleep(0)
+    reaper_stats['rows'] += evict_expired(now)
+    elapsed = time.monotonic() - started
+    reaper_stats['passes'] += 1
+    reaper_stats['last_pass_seconds'] = round(elapsed, 3)
+    reaper_stats['max_pass_seconds'] = max(reaper_stats['max_pass_seconds'], round(elapsed, 3))
 
+def cleanup_inactive_games():
+    while True:
+        try:
+            with app.app_context():
+                run_reaper_pass()
         except Exception as e:
             logger.error(f"Error in cleanup_inactive_games: {str(e)}")
             db.session.rollback()
-        socketio.sleep(60)  # Run every minute
+        socketio.sleep(REAPER_INTERVAL)
 
 socketio.start_background_task(cleanup_inactive_games)
+socketio.start_background_task(flush_game_states)
+socketio.start_background_task(question_deadlines.run)
+socketio.start_background_task(game_journal.run)
+socketio.start_background_task(spectators.run)
+socketio.start_background_task(flush_unread_counts)
+socketio.start_background_task(state_backend.listen, handle_state_message)
+if not state_backend.shared:
+    # With a shared backend another worker may own these games; they are replayed lazily when loaded.
+    socketio.start_background_task(recover_journaled_games)
 
 @app.route('/')
 def welcome():
@@ -409,6 +919,15 @@ def play():
         update_game_activity(game_id)
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    return jsonify({'question_pool': question_pool.stats(), 'question_bank': bank_stats, 'gemini': question_client.snapshot(), 'generation': {'failures': generation_failures, 'attempts_per_turn': generation_attempts}, 'hedge': hedge_stats, 'game_states': dict(game_states.stats(), sessions=len(sessions)), 'question_deadlines': question_deadlines.snapshot(), 'reaper': reaper_stats, 'mailboxes': game_mailboxes.snapshot(), 'relay': relay_stats, 'journal': game_journal.snapshot(), 'topic_popularity': dict(popularity_stats, topics=list(popular_topics(TOPIC_CATALOG))), 'wire': {'connections': {wire: list(wire_encodings.values()).count(wire) for wire in (WIRE_JSON, WIRE_MSGPACK)}, 'events': wire_stats.snapshot()}, 'spectators': spectators.snapshot(), 'chat': dict(chat_stats, pending=len(pending_unread))})
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    if check_query_plans():
+        raise SystemExit(1)
+
 @app.route('/create_game', methods=['POST'])
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
 def create_game():
@@ -423,6 +942,8 @@ def create_game():
             new_player = Player(game_id=game_id, username=username, score=0, emoji=random.choice(PLAYER_EMOJIS), disconnected=False)
             db.session.add(new_player)
             db.session.commit()
+            state = game_states.add(GameState.from_row(new_game, [new_player]))
+            journal_event(state, 'joined', players=state.players, player_fields=('id', 'emoji', 'score', 'disconnected'))
             session['game_id'] = game_id
             session['username'] = username
             session.permanent = True
@@ -436,6 +957,7 @@ def create_game():
 
 @app.route('/join_game', methods=['POST'])
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+@serialized_by_game(lambda: request.form.get('game_id'))
 def join_game():
     username = request.form.get('username')
     game_id = request.form.get('game_id')
@@ -443,20 +965,23 @@ def join_game():
         return render_template('index.html', error="Username and Game ID are required")
     try:
         with app.app_context():
-            game = Game.query.filter_by(id=game_id).first()
-            if not game:
+            state = game_states.get(game_id)
+            if not state:
                 return render_template('index.html', error="Game not found")
-            if game.status != 'waiting' or Player.query.filter_by(game_id=game_id).count() >= 10:
+            if state.status != 'waiting' or len(state.players) >= MAX_PLAYERS:
                 return render_template('index.html', error="Game already in progress or full")
-            existing_player = Player.query.filter_by(game_id=game_id, username=username).first()
+            existing_player = state.player(username)
             if existing_player:
                 existing_player.disconnected = False
-                db.session.commit()
+                state.touch()
             else:
-                available_emojis = [e for e in PLAYER_EMOJIS if e not in [p.emoji for p in Player.query.filter_by(game_id=game_id).all()]]
+                available_emojis = [e for e in PLAYER_EMOJIS if e not in state.emojis().values()]
                 new_player = Player(game_id=game_id, username=username, score=0, emoji=random.choice(available_emojis) if available_emojis else random.choice(PLAYER_EMOJIS), disconnected=False)
                 db.session.add(new_player)
                 db.session.commit()
+                existing_player = PlayerState.from_row(new_player)
+                state.players.append(existing_player)
+            journal_event(state, 'joined', players=[existing_player], player_fields=('id', 'emoji', 'score', 'disconnected'))
             session['game_id'] = game_id
             session['username'] = username
             session.permanent = True
@@ -472,32 +997,40 @@ def join_game():
 def game(game_id):
     try:
         with app.app_context():
-            game = Game.query.filter_by(id=game_id).first()
-            if not game:
+            state = game_states.peek(game_id)
+            if not state:
                 session.pop('game_id', None)
                 session.pop('username', None)
                 return redirect(url_for('welcome'))
             username = session.get('username')
-            if not username or not Player.query.filter_by(game_id=game_id, username=username).first():
+            if not username or not state.player(username):
                 session.pop('game_id', None)
                 session.pop('username', None)
                 return redirect(url_for('welcome'))
             update_game_activity(game_id)
-            return render_template('game.html', game_id=game_id, username=username, is_host=(username == game.host))
+            return render_template('game.html', game_id=game_id, username=username, is_host=(username == state.host))
     except Exception as e:
         logger.error(f"Error in game route for game {game_id}: {str(e)}")
         return redirect(url_for('welcome'))
 
+@app.route('/watch', defaults={'game_id': None})
+@app.route('/watch/<game_id>')
+def watch(game_id):
+    game_id = game_id or request.args.get('game_id')
+    with app.app_context():
+        if not Game.query.filter_by(id=game_id).first():
+            return render_template('index.html', error="Game not found")
+        return render_template('watch.html', game_id=game_id)
+
 @app.route('/final_scoreboard/<game_id>')
 def final_scoreboard(game_id):
     try:
         with app.app_context():
-            game = Game.query.filter_by(id=game_id).first()
-            if not game:
+            state = game_states.peek(game_id)
+            if not state:
                 return redirect(url_for('welcome'))
-            players = Player.query.filter_by(game_id=game_id).all()
-            player_scores = {p.username: p.score for p in players}
-            player_emojis = {p.username: p.emoji for p in players}
+            player_scores = state.scores()
+            player_emojis = state.emojis()
             update_game_activity(game_id)
             return render_template('final_scoreboard.html', game_id=game_id, scores=player_scores, player_emojis=player_emojis)
     except Exception as e:
@@ -506,6 +1039,7 @@ def final_scoreboard(game_id):
 
 @app.route('/reset_game/<game_id>', methods=['POST'])
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+@serialized_by_game(lambda game_id: game_id)
 def reset_game(game_id):
     try:
         with app.app_context():
@@ -514,25 +1048,28 @@ def reset_game(game_id):
             if not session_game_id or not session_username or session_game_id != game_id:
                 logger.warning(f"Unauthorized reset attempt for game {game_id} from session {session_game_id}")
                 return jsonify({'error': 'Unauthorized: Invalid session'}), 403
-            game = Game.query.filter_by(id=game_id).first()
-            if not game:
+            state = game_states.get(game_id)
+            if not state:
                 logger.error(f"Game {game_id} not found for reset")
                 return jsonify({'error': 'Game not found'}), 404
             logger.info(f"Resetting game {game_id} by {session_username}")
-            if game_id in active_timers:
-                active_timers[game_id].cancel()
-                del active_timers[game_id]
+            if question_deadlines.cancel(game_id):
                 logger.debug(f"Cancelled timer for game {game_id} on reset")
-            game.status = 'waiting'
-            game.current_player_index = 0
-            game.current_question = None
-            game.question_start_time = None
-            players = Player.query.filter_by(game_id=game_id).all()
-            for player in players:
+            cancel_question_race(game_id)
+            state.status = 'waiting'
+            state.current_player_index = 0
+            state.current_question = None
+            state.question_start_time = None
+            state.new_round()
+            changed = [p for p in state.players if p.score or p.disconnected]
+            for player in state.players:
                 player.score = 0
                 player.disconnected = False
-            db.session.commit()
-            socketio.emit('game_reset', {'players': [p.username for p in players], 'scores': {p.username: p.score for p in players}, 'player_emojis': {p.username: p.emoji for p in players}}, room=game_id)
+            state.touch()
+            journal_event(state, 'reset', 'status', 'current_player_index', 'current_question', 'question_start_time', players=state.players, player_fields=('score', 'disconnected'))
+            if changed:
+                emit_state_delta(state, scores={p.username: 0 for p in changed}, connected={p.username: True for p in changed})
+            emit_to_game(state, 'game_reset', {})
             update_game_activity(game_id)
             logger.info(f"Game {game_id} successfully reset")
             return jsonify({'success': 'Game reset successfully'}), 200
@@ -546,90 +1083,154 @@ def reset_game(game_id):
 
 @socketio.on('connect')
 def handle_connect():
-    logger.debug(f"Client connected: {request.sid}")
+    wire_encodings[request.sid] = negotiate(request.args.get('wire'))
+    logger.debug(f"Client connected: {request.sid} ({wire_encodings[request.sid]})")
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    username = session.get('username')
-    if not username:
-        return
+    if not release_sid(request.sid) and state_backend.shared:
+        # The socket's events were relayed, so the worker owning its game holds the binding.
+        state_backend.publish({'type': 'disconnected', 'sid': request.sid, 'worker': WORKER_ID})
+
+def release_sid(sid):
+    wire_encodings.pop(sid, None)
+    watched = spectators.remove(sid)
+    bound = sessions.unbind(sid)
+    if bound:
+        owner = game_states.remote_owner(bound[0])
+        if owner:
+            relay_to_owner(owner, bound[0], mark_player_disconnected, bound)
+        else:
+            game_mailboxes.call(bound[0], mark_player_disconnected, *bound)
+    return bound or watched
+
+def mark_player_disconnected(game_id, username):
     with app.app_context():
-        for game in Game.query.all():
-            player = Player.query.filter_by(game_id=game.id, username=username).first()
-            if player:
-                player.disconnected = True
-                db.session.commit()
-                socketio.emit('player_disconnected', {'username': username}, room=game.id)
-                socketio.emit('player_left', {'username': username, 'players': [p.username for p in Player.query.filter_by(game_id=game.id).all()], 'player_emojis': {p.username: p.emoji for p in Player.query.filter_by(game_id=game.id).all()}}, room=game.id)
-                if game.status == 'in_progress':
-                    active_players = Player.query.filter_by(game_id=game.id, disconnected=False).count()
-                    if active_players == 0:
-                        game.status = 'waiting'
-                        if game.id in active_timers:
-                            active_timers[game.id].cancel()
-                            del active_timers[game.id]
-                        db.session.commit()
-                        socketio.emit('game_paused', {'message': 'All players disconnected'}, room=game.id)
-                    elif Player.query.filter_by(game_id=game.id).offset(game.current_player_index).first().username == username:
-                        next_player = get_next_active_player(game.id)
-                        if next_player:
-                            socketio.emit('turn_skipped', {'disconnected_player': username, 'next_player': next_player.username}, room=game.id)
-            update_game_activity(game.id)
+        state = game_states.get(game_id)
+        player = state.player(username) if state else None
+        if player:
+            player.disconnected = True
+            state.touch()
+            journal_event(state, 'left', players=[player], player_fields=('disconnected', 'sid'))
+            emit_state_delta(state, connected={username: False})
+            socketio.emit('player_disconnected', {'username': username}, room=state.id)
+            socketio.emit('player_left', {'username': username}, room=state.id)
+            if state.status == 'in_progress':
+                if not state.active_players():
+                    state.status = 'waiting'
+                    question_deadlines.cancel(state.id)
+                    cancel_question_race(state.id)
+                    journal_event(state, 'paused', 'status')
+                    emit_to_game(state, 'game_paused', {'message': 'All players disconnected'})
+                elif state.player_at(state.current_player_index) is player:
+                    next_player = get_next_active_player(state.id)
+                    if next_player:
+                        emit_to_game(state, 'turn_skipped', {'disconnected_player': username, 'next_player': next_player.username})
+            update_game_activity(state.id)
+
+relayed_handlers['mark_player_disconnected'] = mark_player_disconnected
+
+def join_game_rooms(game_id, player):
+    player.wire = wire_encodings.get(request.sid, WIRE_JSON)
+    join_room(game_id)
+    join_room(wire_room(game_id, player.wire))
+
+def player_sid(state, username):
+    # The local index covers sockets on this worker; the owned game state knows sockets on every worker.
+    player = state.player(username)
+    if not player or player.disconnected:
+        return None
+    return sessions.sid_for(state.id, username) or player.sid
 
 @socketio.on('join_game_room')
+@serialized_by_game(event_game_id)
 def handle_join_game_room(data):
     game_id = data.get('game_id')
     username = data.get('username')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state:
             socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
             return
-        player = Player.query.filter_by(game_id=game_id, username=username).first()
+        player = state.player(username)
         if player:
             player.disconnected = False
             player.sid = request.sid
-            db.session.commit()
-            join_room(game_id)
-            players = Player.query.filter_by(game_id=game_id).all()
-            current_player = Player.query.filter_by(game_id=game_id).offset(game.current_player_index).first() if game.status == 'in_progress' and Player.query.filter_by(game_id=game_id).count() > game.current_player_index else None
-            socketio.emit('player_rejoined', {'username': username, 'players': [p.username for p in players], 'scores': {p.username: p.score for p in players}, 'player_emojis': {p.username: p.emoji for p in players}, 'status': game.status, 'current_player': current_player.username if current_player else None, 'current_question': game.current_question}, room=game_id)
-        elif game.status == 'waiting' and Player.query.filter_by(game_id=game_id).count() < 10:
-            available_emojis = [e for e in PLAYER_EMOJIS if e not in [p.emoji for p in Player.query.filter_by(game_id=game_id).all()]]
+            state.touch()
+            journal_event(state, 'joined', players=[player], player_fields=('id', 'emoji', 'score', 'disconnected', 'sid'))
+            sessions.bind(request.sid, game_id, username)
+            # The room gets the delta first and the joiner a snapshot that already includes it, so neither sees a gap.
+            emit_state_delta(state, connected={username: True})
+            socketio.emit('state_snapshot', state_snapshot(state), to=request.sid)
+            join_game_rooms(game_id, player)
+            current_player = state.player_at(state.current_player_index) if state.status == 'in_progress' else None
+            socketio.emit('player_rejoined', {'username': username, 'status': state.status, 'current_player': current_player.username if current_player else None, 'current_question': state.current_question}, room=game_id)
+        elif state.status == 'waiting' and len(state.players) < MAX_PLAYERS:
+            available_emojis = [e for e in PLAYER_EMOJIS if e not in state.emojis().values()]
             new_player = Player(game_id=game_id, username=username, score=0, emoji=random.choice(available_emojis) if available_emojis else random.choice(PLAYER_EMOJIS), disconnected=False, sid=request.sid)
             db.session.add(new_player)
             db.session.commit()
-            join_room(game_id)
-            players = Player.query.filter_by(game_id=game_id).all()
-            socketio.emit('player_joined', {'username': username, 'players': [p.username for p in players], 'player_emojis': {p.username: p.emoji for p in players}}, room=game_id)
+            player = PlayerState.from_row(new_player)
+            state.players.append(player)
+            journal_event(state, 'joined', players=[player], player_fields=('id', 'emoji', 'score', 'disconnected', 'sid'))
+            sessions.bind(request.sid, game_id, username)
+            emit_state_delta(state, joined={'username': username, 'emoji': player.emoji, 'score': player.score})
+            socketio.emit('state_snapshot', state_snapshot(state), to=request.sid)
+            join_game_rooms(game_id, player)
+            socketio.emit('player_joined', {'username': username}, room=game_id)
         else:
             socketio.emit('error', {'message': 'Game is full or already started'}, to=request.sid)
-        if game_id not in unread_messages:
-            unread_messages[game_id] = {}
-        if username not in unread_messages[game_id]:
-            unread_messages[game_id][username] = 0
-        socketio.emit('update_unread_count', {'count': unread_messages[game_id][username]}, to=request.sid)
+            return
+        history = chat_history(game_id)
+        socketio.emit('chat_history', {'messages': history}, to=request.sid)
+        player.unread = unread_count(history, username, state_backend.count('chat_read', game_id, username))
+        emit_to_sid('update_unread_count', {'count': player.unread}, request.sid, player.wire)
         update_game_activity(game_id)
 
+@socketio.on('request_state_snapshot')
+@serialized_by_game(event_game_id)
+def handle_request_state_snapshot(data):
+    bound = sessions.lookup(request.sid)
+    with app.app_context():
+        state = game_states.get(bound[0]) if bound and bound[0] == data.get('game_id') else None
+        if not state:
+            socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
+            return
+        socketio.emit('state_snapshot', state_snapshot(state), to=request.sid)
+
+@socketio.on('watch_game')
+@serialized_by_game(event_game_id)
+def handle_watch_game(data):
+    game_id = event_game_id(data)
+    with app.app_context():
+        view = load_spectator_view(game_id) if game_id else None
+        if view is None:
+            socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
+            return
+        spectators.add(game_id, request.sid, view)
+        logger.debug(f"Game {game_id}: Spectator {request.sid} watching")
+
 @socketio.on('start_game')
+@serialized_by_game(event_game_id)
 def handle_start_game(data):
     game_id = data.get('game_id')
     username = data.get('username')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id, host=username, status='waiting').first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state or state.host != username or state.status != 'waiting':
             socketio.emit('error', {'message': 'Game not found or not host'}, room=game_id)
             return
-        game.status = 'in_progress'
-        game.current_player_index = 0
-        db.session.commit()
-        players = Player.query.filter_by(game_id=game_id).all()
-        current_player = players[game.current_player_index]
+        state.status = 'in_progress'
+        state.current_player_index = 0
+        state.touch()
+        journal_event(state, 'started', 'status', 'current_player_index')
+        current_player = state.players[state.current_player_index]
         logger.debug(f"Game {game_id}: Started by {username}, current_player={current_player.username}")
-        socketio.emit('game_started', {'current_player': current_player.username, 'players': [p.username for p in players], 'scores': {p.username: p.score for p in players}, 'player_emojis': {p.username: p.emoji for p in players}}, room=game_id)
+        emit_to_game(state, 'game_started', {'current_player': current_player.username})
         update_game_activity(game_id)
 
 @socketio.on('request_player_top_topics')
+@serialized_by_game(event_game_id)
 def handle_request_player_top_topics(data):
     game_id = data.get('game_id')
     username = data.get('username')
@@ -637,21 +1238,159 @@ def handle_request_player_top_topics(data):
     logger.debug(f"Game {game_id}: Sending top topics placeholder '{placeholder_text}' to {username}")
     socketio.emit('player_top_topics', {'placeholder': placeholder_text}, to=request.sid)
 
+def publish_question(state, topic, question_data):
+    game_id = state.id
+    # Resolved at insert time: the reaper drops question-less topics, so an object looked up before generation can be stale.
+    topic_obj = get_or_create_topic(topic)
+    new_question = Question(game_id=game_id, topic_id=topic_obj.id, question_text=question_data['question'], answer_text=question_data['answer'])
+    db.session.add(new_question)
+    if question_data.get('bank_id'):
+        record_use(question_data['bank_id'], state.usernames())
+    db.session.commit()
+    uniqueness.add(game_id, question_data['question'], question_data['answer'])
+    state.current_question = question_data
+    state.current_question['question_id'] = new_question.id
+    state.question_start_time = datetime.utcnow()
+    state.last_topic = topic_obj.normalized_name
+    state.new_round()
+    state.touch()
+    journal_event(state, 'question_issued', 'current_question', 'question_start_time', topic=topic)
+    emit_to_game(state, 'question_ready', {'question': question_data['question'], 'options': question_data['options'], 'topic': topic, 'question_id': new_question.id})
+    logger.debug(f"Game {game_id}: Emitted question_ready with question_id {new_question.id}")
+    question_deadlines.schedule(game_id, QUESTION_TIME_LIMIT, game_mailboxes.post, game_id, question_timer, game_id)
+    logger.debug(f"Game {game_id}: Started 30s timer for question_id {new_question.id}")
+    return new_question.id
+
+def complete_streamed_question(game_id, question_id, question_data):
+    # A question published mid-stream gets its explanation, and its bank entry counts as used, once the stream is done.
+    state = game_states.owned(game_id)
+    if not state:
+        return
+    if question_data.get('bank_id'):
+        record_use(question_data['bank_id'], state.usernames())
+        db.session.commit()
+    if state.current_question and state.current_question.get('question_id') == question_id:
+        state.current_question['explanation'] = question_data['explanation']
+        if question_data.get('bank_id'):
+            state.current_question['bank_id'] = question_data['bank_id']
+        state.touch()
+        journal_event(state, 'question_issued', 'current_question')
+        logger.debug(f"Game {game_id}: Filled in streamed explanation for question_id {question_id}")
+
+class QuestionRace:
+    def __init__(self, state):
+        self.winner = None
+        self.turn = self._turn(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _turn(state):
+        return (state.status, state.current_player_index, state.round)
+
+    def current(self, state):
+        return state is not None and self._turn(state) == self.turn
+
+    def claim(self, contender):
+        with self._lock:
+            if self.winner is None:
+                self.winner = contender
+            return self.winner == contender
+
+def cancel_question_race(game_id):
+    question_deadlines.cancel((game_id, 'fallback'))
+    race = question_races.pop(game_id, None)
+    if race and race.claim('cancelled'):
+        logger.debug(f"Game {game_id}: Called off the pending question race")
+
+def claim_question_race(game_id, race, contender):
+    # Runs in the game's mailbox; a reset, pause or new turn since the race started means nobody is waiting for this question.
+    # A race called off by a handoff is settled without touching the game, so a late question cannot pull it back.
+    if race.winner is not None:
+        return None
+    state = game_states.get(game_id)
+    if not race.current(state):
+        if race.claim('stale'):
+            hedge_stats['stale'] += 1
+            logger.info(f"Game {game_id}: Dropping {contender} question, the game moved on while it was generated")
+        if question_races.get(game_id) is race:
+            cancel_question_race(game_id)
+        return None
+    if not race.claim(contender):
+        return None
+    if question_races.get(game_id) is race:
+        del question_races[game_id]
+    question_deadlines.cancel((game_id, 'fallback'))
+    return state
+
+def publish_live_question(game_id, topic, race, question_data):
+    state = claim_question_race(game_id, race, 'live')
+    return publish_question(state, topic, question_data) if state else None
+
+def generate_live_question(game_id, topic, sid, race):
+    with app.app_context():
+        published = []
+        def on_ready(partial):
+            question_id = game_mailboxes.call(game_id, publish_live_question, game_id, topic, race, partial)
+            if question_id:
+                published.append(question_id)
+        try:
+            question_data = fetch_question(topic, game_id, on_ready=on_ready)
+            if published:
+                game_mailboxes.call(game_id, complete_streamed_question, game_id, published[0], question_data)
+            elif not game_mailboxes.call(game_id, publish_live_question, game_id, topic, race, question_data):
+                logger.debug(f"Game {game_id}: Live question for '{topic}' was not published ({race.winner}); kept in question bank")
+            if race.winner == 'live':
+                hedge_stats['live'] += 1
+        except ValueError as e:
+            logger.error(f"Game {game_id}: Failed to generate question for '{topic}': {str(e)}")
+            db.session.rollback()
+            # Players get a question from the bank instead; the error only reaches them if the bank has none.
+            game_mailboxes.post(game_id, serve_fallback_question, game_id, topic, race, sid, str(e))
+        except Exception as e:
+            logger.error(f"Game {game_id}: Unexpected error generating question for '{topic}': {str(e)}")
+            db.session.rollback()
+            game_mailboxes.post(game_id, serve_fallback_question, game_id, topic, race, sid, f"Unexpected error generating question for '{topic}'. Please try again.")
+
+def serve_fallback_question(game_id, topic, race, sid=None, error=None):
+    # Runs when the live question is late (the race's deadline) or has failed (error is what players would otherwise see).
+    with app.app_context():
+        if race.winner is not None:
+            return
+        game_index = uniqueness.get(game_id)
+        fallback = fallback_bank.pick(topic, lambda q: find_duplicate(q, (game_index,)))
+        if fallback:
+            state = claim_question_race(game_id, race, 'fallback')
+            if state:
+                hedge_stats['fallback'] += 1
+                reason = "failed" if error else f"exceeded {QUESTION_LATENCY_BUDGET}s"
+                logger.info(f"Game {game_id}: Live question for '{topic}' {reason}, serving fallback")
+                publish_question(state, topic, fallback)
+        elif error and claim_question_race(game_id, race, 'error'):
+            hedge_stats['errors'] += 1
+            socketio.emit('error', {'message': error}, to=sid)
+
+def race_live_question(state, topic, sid):
+    # The fallback is a deadline rather than a wait so the game's mailbox stays free while Gemini works.
+    race = question_races[state.id] = QuestionRace(state)
+    socketio.start_background_task(generate_live_question, state.id, topic, sid, race)
+    question_deadlines.schedule((state.id, 'fallback'), QUESTION_LATENCY_BUDGET, game_mailboxes.post, state.id, serve_fallback_question, state.id, topic, race)
+
 @socketio.on('select_topic')
+@serialized_by_game(event_game_id)
 def handle_select_topic(data):
     game_id = data.get('game_id')
     username = data.get('username')
     topic = data.get('topic', '').strip().lower()
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game or game.status != 'in_progress':
+        state = game_states.get(game_id)
+        if not state or state.status != 'in_progress':
             socketio.emit('error', {'message': 'Game not in progress'}, to=request.sid)
             return
-        active_players = Player.query.filter_by(game_id=game_id, disconnected=False).order_by(Player.id).all()
+        active_players = state.active_players()
         if not active_players:
             socketio.emit('error', {'message': 'No active players'}, to=request.sid)
             return
-        current_player = active_players[game.current_player_index % len(active_players)]
+        current_player = active_players[state.current_player_index % len(active_players)]
         if current_player.disconnected:
             current_player = get_next_active_player(game_id)
             if not current_player:
@@ -662,29 +1401,17 @@ def handle_select_topic(data):
             return
         if not topic:
             topic = suggest_random_topic(game_id, username)
-        if game.current_question:
+        if state.current_question:
             logger.debug(f"Game {game_id}: Clearing stale current_question before new topic")
-            game.current_question = None
-            db.session.commit()
+            state.current_question = None
+            state.touch()
+        journal_event(state, 'topic_selected', 'current_question', username=username, topic=topic)
         try:
-            topic_obj = get_or_create_topic(topic)
-            question_data = get_trivia_question(topic, game_id)
-            new_question = Question(game_id=game_id, topic_id=topic_obj.id, question_text=question_data['question'], answer_text=question_data['answer'])
-            db.session.add(new_question)
-            db.session.flush()
-            game.current_question = question_data
-            game.current_question['question_id'] = new_question.id
-            game.question_start_time = datetime.utcnow()
-            db.session.commit()
-            socketio.emit('question_ready', {'question': question_data['question'], 'options': question_data['options'], 'topic': topic, 'question_id': new_question.id}, room=game_id)
-            logger.debug(f"Game {game_id}: Emitted question_ready with question_id {new_question.id}")
-            if game_id in active_timers:
-                active_timers[game_id].cancel()
-                logger.debug(f"Game {game_id}: Cancelled existing timer")
-            timer = threading.Timer(30.0, question_timer, args=(game_id,))
-            active_timers[game_id] = timer
-            timer.start()
-            logger.debug(f"Game {game_id}: Started 30s timer for question_id {new_question.id}")
+            question_data = take_prefetched_question(game_id, topic)
+            if question_data:
+                publish_question(state, topic, question_data)
+            else:
+                race_live_question(state, topic, request.sid)
             update_game_activity(game_id)
         except ValueError as e:
             logger.error(f"Game {game_id}: Failed to generate question for '{topic}': {str(e)}")
@@ -696,59 +1423,53 @@ def handle_select_topic(data):
             db.session.rollback()
 
 @socketio.on('submit_answer')
+@serialized_by_game(event_game_id)
 def handle_submit_answer(data):
     game_id = data.get('game_id')
     username = data.get('username')
     answer = data.get('answer')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        player = Player.query.filter_by(game_id=game_id, username=username).first()
-        if not game or not player or game.status != 'in_progress' or not game.current_question:
+        state = game_states.get(game_id)
+        player = state.player(username) if state else None
+        if not state or not player or state.status != 'in_progress' or not state.current_question:
             logger.debug(f"Game {game_id}: Invalid submit_answer attempt by {username}")
             socketio.emit('error', {'message': 'Invalid game state'}, to=request.sid)
             return
-        current_question_id = game.current_question['question_id']
-        time_elapsed = datetime.utcnow() - game.question_start_time
+        current_question_id = state.current_question['question_id']
+        time_elapsed = datetime.utcnow() - state.question_start_time
         logger.debug(f"Game {game_id}: Answer submitted by {username}, time elapsed: {time_elapsed.total_seconds()}s")
-        if time_elapsed.total_seconds() > 30:
+        if time_elapsed.total_seconds() > QUESTION_TIME_LIMIT:
             logger.debug(f"Game {game_id}: Time expired for {username}, setting answer to None")
             answer = None
         elif answer in ['A', 'B', 'C', 'D']:
             option_index = ord(answer) - ord('A')
-            answer = game.current_question['options'][option_index]
+            answer = state.current_question['options'][option_index]
         else:
             logger.debug(f"Game {game_id}: Invalid answer format from {username}: {answer}")
             answer = None
-        existing_answer = Answer.query.filter_by(game_id=game_id, player_id=player.id, question_id=current_question_id).first()
-        if existing_answer:
-            existing_answer.answer = answer
-        else:
-            new_answer = Answer(game_id=game_id, player_id=player.id, question_id=current_question_id, answer=answer)
-            db.session.add(new_answer)
-        db.session.commit()
+        state.answers[player.id] = answer
+        seq = journal_event(state, 'answer_submitted', player_id=player.id, question_id=current_question_id, answer=answer)
+        state.unsaved_answers_seq = state.unsaved_answers_seq or seq
         logger.debug(f"Game {game_id}: Recorded answer '{answer}' for {username} on question_id {current_question_id}")
-        socketio.emit('player_answered', {'username': username}, room=game_id)
-        active_players = Player.query.filter_by(game_id=game_id, disconnected=False).all()
-        answers_submitted = Answer.query.filter_by(game_id=game_id, question_id=current_question_id).count()
-        total_players = Player.query.filter_by(game_id=game_id).count()
-        logger.debug(f"Game {game_id}: Active players: {[p.username for p in active_players]}, Total: {len(active_players)}")
-        logger.debug(f"Game {game_id}: Answers submitted: {answers_submitted}, Total players: {total_players}")
-        if answers_submitted >= len(active_players) and answers_submitted >= total_players:
-            logger.debug(f"Game {game_id}: All {len(active_players)} active players answered out of {total_players} total, processing results")
-            if game_id in active_timers:
-                active_timers[game_id].cancel()
-                del active_timers[game_id]
+        emit_to_game(state, 'player_answered', {'username': username})
+        logger.debug(f"Game {game_id}: Answers submitted: {len(state.answers)}, Total players: {len(state.players)}")
+        if state.all_answered():
+            logger.debug(f"Game {game_id}: All {len(state.players)} players answered, processing results")
+            # Whoever cancels the deadline owns the round; if the timer already fired it is scoring it.
+            if question_deadlines.cancel(game_id):
                 logger.debug(f"Game {game_id}: Timer cancelled due to all answers submitted")
-            process_round_results(game_id)
+                process_round_results(game_id)
 
 @socketio.on('submit_feedback')
+@serialized_by_game(event_game_id)
 def handle_feedback(data):
     game_id = data.get('game_id')
     topic_id = data.get('topic_id')
     username = data.get('username')
     rating = data.get('rating')
     with app.app_context():
-        player = Player.query.filter_by(username=username, game_id=game_id).first()
+        state = game_states.get(game_id)
+        player = state.player(username) if state else None
         topic = Topic.query.get(topic_id)
         if not player or not topic:
             logger.error(f"Invalid player {username} or topic {topic_id} in game {game_id}")
@@ -758,15 +1479,18 @@ def handle_feedback(data):
             logger.error(f"Invalid rating value: {rating} for {username} in game {game_id}")
             socketio.emit('error', {'message': 'Invalid rating'}, to=request.sid)
             return
+        profile = player_profile(state, player)
         try:
             rating_value = 1 if rating else 0
             existing_rating = Rating.query.filter_by(game_id=game_id, player_id=player.id, topic_id=topic_id).first()
+            record_rating(topic.normalized_name, rating, existing_rating.rating if existing_rating else None)
             if existing_rating:
                 existing_rating.rating = rating_value
             else:
                 new_rating = Rating(game_id=game_id, player_id=player.id, topic_id=topic_id, rating=rating_value)
                 db.session.add(new_rating)
             db.session.commit()
+            profile.rate(topic.normalized_name, rating)
             logger.debug(f"Player {username} rated topic {topic.normalized_name} as {'Like' if rating_value else 'Dislike'} in game {game_id}")
         except SQLAlchemyError as e:
             logger.error(f"Failed to save rating for {username} on topic {topic_id} in game {game_id}: {str(e)}")
@@ -774,114 +1498,114 @@ def handle_feedback(data):
             socketio.emit('error', {'message': 'Failed to save rating'}, to=request.sid)
 
 @socketio.on('send_chat_message')
+@serialized_by_game(event_game_id)
 def handle_chat_message(data):
     game_id = data.get('game_id')
     username = data.get('username')
     message = data.get('message')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state:
             socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
             return
-        player = Player.query.filter_by(game_id=game_id, username=username).first()
+        player = state.player(username)
         if not player or player.disconnected:
             socketio.emit('error', {'message': 'Player not in game or disconnected'}, to=request.sid)
             return
-        if game_id not in unread_messages:
-            unread_messages[game_id] = {}
-        players = Player.query.filter_by(game_id=game_id).all()
-        for p in players:
-            if p.username != username and not p.disconnected:
-                if p.username not in unread_messages[game_id]:
-                    unread_messages[game_id][p.username] = 0
-                unread_messages[game_id][p.username] += 1
-                logger.debug(f"Game {game_id}: Unread count for {p.username} increased to {unread_messages[game_id][p.username]}")
-        socketio.emit('chat_message', {'username': username, 'message': message}, room=game_id)
-        for p in players:
-            if p.username != username and not p.disconnected:
-                socketio.emit('update_unread_count', {'count': unread_messages[game_id][p.username]}, to=p.sid if hasattr(p, 'sid') else None)
+        seq = state_backend.incr('chat_seq', game_id, 'last')
+        state_backend.push_recent('chat', game_id, json.dumps({'seq': seq, 'username': username, 'message': message}), CHAT_HISTORY)
+        emit_to_game(state, 'chat_message', {'username': username, 'message': message})
+        # Unread badges are recomputed from read cursors by flush_unread_counts, at most once per player per interval.
+        pending_unread.add(game_id)
+        chat_stats['messages'] += 1
         logger.debug(f"Game {game_id}: Chat message from {username}: {message}")
         update_game_activity(game_id)
 
 @socketio.on('reset_unread_count')
+@serialized_by_game(event_game_id)
 def handle_reset_unread_count(data):
     game_id = data.get('game_id')
     username = data.get('username')
     with app.app_context():
-        if game_id in unread_messages and username in unread_messages[game_id]:
-            unread_messages[game_id][username] = 0
-            socketio.emit('update_unread_count', {'count': 0}, to=request.sid)
-            logger.debug(f"Game {game_id}: Unread count reset to 0 for {username}")
+        state = game_states.get(game_id)
+        player = state.player(username) if state else None
+        if not player:
+            return
+        state_backend.put('chat_read', game_id, username, state_backend.count('chat_seq', game_id, 'last'))
+        player.unread = 0
+        emit_to_sid('update_unread_count', {'count': 0}, request.sid, player.wire)
+        logger.debug(f"Game {game_id}: Unread count reset to 0 for {username}")
 
 @socketio.on('voice_offer')
+@serialized_by_game(event_game_id)
 def handle_voice_offer(data):
     game_id = data.get('game_id')
     from_username = data.get('from')
     to_username = data.get('to')
     offer = data.get('offer')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state:
             socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
             return
-        to_player = Player.query.filter_by(game_id=game_id, username=to_username).first()
-        if not to_player or to_player.disconnected or not to_player.sid:
+        logger.info(f"Game {game_id}: Received voice_offer from {from_username} to {to_username}")
+        to_sid = emit_to_player(state, to_username, 'voice_offer', {'from': from_username, 'offer': offer})
+        if not to_sid:
             logger.info(f"Game {game_id}: Cannot send offer to {to_username} - disconnected or no SID")
             return
-        logger.info(f"Game {game_id}: Received voice_offer from {from_username} to {to_username}")
-        socketio.emit('voice_offer', {'from': from_username, 'offer': offer}, to=to_player.sid)
-        logger.info(f"Game {game_id}: Relayed voice_offer from {from_username} to {to_username} (SID: {to_player.sid})")
+        logger.info(f"Game {game_id}: Relayed voice_offer from {from_username} to {to_username} (SID: {to_sid})")
 
 @socketio.on('voice_answer')
+@serialized_by_game(event_game_id)
 def handle_voice_answer(data):
     game_id = data.get('game_id')
     from_username = data.get('from')
     to_username = data.get('to')
     answer = data.get('answer')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state:
             socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
             return
-        to_player = Player.query.filter_by(game_id=game_id, username=to_username).first()
-        if not to_player or to_player.disconnected or not to_player.sid:
+        logger.info(f"Game {game_id}: Received voice_answer from {from_username} to {to_username}")
+        to_sid = emit_to_player(state, to_username, 'voice_answer', {'from': from_username, 'answer': answer})
+        if not to_sid:
             logger.info(f"Game {game_id}: Cannot send answer to {to_username} - disconnected or no SID")
             return
-        logger.info(f"Game {game_id}: Received voice_answer from {from_username} to {to_username}")
-        socketio.emit('voice_answer', {'from': from_username, 'answer': answer}, to=to_player.sid)
-        logger.info(f"Game {game_id}: Relayed voice_answer from {from_username} to {to_username} (SID: {to_player.sid})")
+        logger.info(f"Game {game_id}: Relayed voice_answer from {from_username} to {to_username} (SID: {to_sid})")
 
 @socketio.on('voice_candidate')
+@serialized_by_game(event_game_id)
 def handle_voice_candidate(data):
     game_id = data.get('game_id')
     from_username = data.get('from')
     to_username = data.get('to')
     candidate = data.get('candidate')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state:
             socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
             return
-        to_player = Player.query.filter_by(game_id=game_id, username=to_username).first()
-        if not to_player or to_player.disconnected or not to_player.sid:
+        logger.info(f"Game {game_id}: Received voice_candidate from {from_username} to {to_username}")
+        to_sid = emit_to_player(state, to_username, 'voice_candidate', {'from': from_username, 'candidate': candidate})
+        if not to_sid:
             logger.info(f"Game {game_id}: Cannot send ICE candidate to {to_username} - disconnected or no SID")
             return
-        logger.info(f"Game {game_id}: Received voice_candidate from {from_username} to {to_username}")
-        socketio.emit('voice_candidate', {'from': from_username, 'candidate': candidate}, to=to_player.sid)
-        logger.info(f"Game {game_id}: Relayed voice_candidate from {from_username} to {to_username} (SID: {to_player.sid})")
+        logger.info(f"Game {game_id}: Relayed voice_candidate from {from_username} to {to_username} (SID: {to_sid})")
 
 @socketio.on('speaking_status')
+@serialized_by_game(event_game_id)
 def handle_speaking_status(data):
     game_id = data.get('game_id')
     username = data.get('username')
     speaking = data.get('speaking')
     with app.app_context():
-        game = Game.query.filter_by(id=game_id).first()
-        if not game:
+        state = game_states.get(game_id)
+        if not state:
             socketio.emit('error', {'message': 'Game not found'}, to=request.sid)
             return
         logger.info(f"Game {game_id}: {username} is {'speaking' if speaking else 'not speaking'}")
-        socketio.emit('speaking_status', {'username': username, 'speaking': speaking}, room=game_id)
+        emit_to_game(state, 'speaking_status', {'username': username, 'speaking': speaking})
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,106 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_IDLE_WAIT = 1.0
+
+class DeadlineScheduler:
+    # One heap for every game's deadline; cancelled entries are dropped lazily when they reach the top.
+    def __init__(self, spawn, max_idle_wait=MAX_IDLE_WAIT):
+        self._spawn = spawn
+        self._max_idle_wait = max_idle_wait
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.stats = {'scheduled': 0, 'cancelled': 0, 'fired': 0, 'errors': 0, 'max_lateness': 0.0, 'total_lateness': 0.0}
+
+    def schedule(self, key, delay, callback, *args):
+        due = time.monotonic() + delay
+        entry = [due, next(self._counter), key, callback, args]
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                previous[3] = None
+                self.stats['cancelled'] += 1
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            self.stats['scheduled'] += 1
+            is_next = self._heap[0] is entry
+        if is_next:
+            self._wakeup.set()
+        return due
+
+    def cancel(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            entry[3] = None
+            self.stats['cancelled'] += 1
+        return True
+
+    def pending(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if entry[3] is None:
+                    continue
+                del self._entries[entry[2]]
+                due.append(entry)
+            while self._heap and self._heap[0][3] is None:
+                heapq.heappop(self._heap)
+            wait = self._heap[0][0] - now if self._heap else self._max_idle_wait
+        return due, min(wait, self._max_idle_wait)
+
+    def _fire(self, entry, now):
+        due_at, _, key, callback, args = entry
+        lateness = max(now - due_at, 0.0)
+        with self._lock:
+            self.stats['fired'] += 1
+            self.stats['total_lateness'] += lateness
+            self.stats['max_lateness'] = max(self.stats['max_lateness'], lateness)
+        if lateness > 1.0:
+            logger.warning(f"Deadline for {key} fired {lateness:.2f}s late")
+        try:
+            self._spawn(callback, *args)
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            logger.error(f"Error dispatching deadline for {key}: {str(e)}")
+
+    def run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due, wait = self._pop_due(now)
+            for entry in due:
+                self._fire(entry, now)
+            if wait > 0:
+                self._wakeup.wait(wait)
+
+    def due(self):
+        now = time.monotonic()
+        with self._lock:
+            return sorted(((key, round(now - entry[0], 3)) for key, entry in self._entries.items() if entry[0] <= now), key=lambda item: -item[1])
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._entries)
+            stats['heap_size'] = len(self._heap)
+        stats['avg_lateness'] = round(stats['total_lateness'] / stats['fired'], 3) if stats['fired'] else 0.0
+        stats['total_lateness'] = round(stats['total_lateness'], 3)
+        stats['max_lateness'] = round(stats['max_lateness'], 3)
+        stats['overdue'] = self.due()
+        return stats
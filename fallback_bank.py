@@ -0,0 +1,69 @@
+import json
+import logging
+import mmap
+import os
+import random
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fallback_questions.tsv')
+GENERAL_TOPIC = 'general'
+
+class FallbackQuestionBank:
+    # Lines are "<normalized topic>\t<question json>"; only offsets are kept in memory.
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._map = None
+        self._index = {}
+        self._words = {}
+        if not os.path.exists(path):
+            logger.warning(f"Fallback question bank not found at {path}")
+            return
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = 0
+        size = len(self._map)
+        while offset < size:
+            end = self._map.find(b'\n', offset)
+            if end == -1:
+                end = size
+            tab = self._map.find(b'\t', offset, end)
+            if tab != -1:
+                topic = self._map[offset:tab].decode('utf-8')
+                self._index.setdefault(topic, []).append((tab + 1, end))
+            offset = end + 1
+        for topic in self._index:
+            for word in topic.split():
+                if len(word) > 3:
+                    self._words.setdefault(word, []).append(topic)
+        logger.info(f"Loaded fallback question bank with {len(self)} questions across {len(self._index)} topics")
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index.values())
+
+    def _read(self, entry):
+        start, end = entry
+        return json.loads(self._map[start:end].decode('utf-8'))
+
+    def _candidate_topics(self, topic):
+        if topic in self._index:
+            return [topic]
+        related = {t for word in topic.split() if len(word) > 3 for t in self._words.get(word, ())}
+        return sorted(related) or [GENERAL_TOPIC]
+
+    def pick(self, topic, is_excluded=None):
+        if self._map is None:
+            return None
+        for candidates in (self._candidate_topics(topic), [GENERAL_TOPIC], list(self._index)):
+            entries = [entry for t in candidates for entry in self._index.get(t, ())]
+            random.shuffle(entries)
+            for entry in entries:
+                question_data = self._read(entry)
+                if is_excluded and is_excluded(question_data):
+                    continue
+                random.shuffle(question_data['options'])
+                question_data['is_fallback'] = True
+                return question_data
+        return None
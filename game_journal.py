@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    from eventlet import patcher, tpool
+except ImportError:
+    tpool = None
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.05
+MAX_OPEN_FILES = 256
+# Below this a compaction only appends a checkpoint record; the file is rewritten once it grows past it.
+COMPACT_BYTES = 64 * 1024
+CHECKPOINT = 'checkpoint'
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot journal {type(value).__name__}")
+
+def _blocking(fn, *args):
+    # eventlet does not green file writes or fsync; run them on its OS thread pool so the hub keeps serving sockets.
+    if tpool is not None and patcher.is_monkey_patched('thread'):
+        return tpool.execute(fn, *args)
+    return fn(*args)
+
+class GameJournal:
+    # One append-only JSON-lines file per game. Appends are buffered and made durable by a single
+    # writer that batches every pending line into one write and one fsync per file (group commit).
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL, compact_bytes=COMPACT_BYTES):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._pending = []
+        self._files = {}
+        self._checkpoints = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._io_lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self.stats = {'appended': 0, 'batches': 0, 'fsyncs': 0, 'max_batch': 0, 'bytes': 0, 'compactions': 0, 'checkpoints': 0, 'replayed': 0, 'errors': 0}
+
+    def _path(self, game_id):
+        return os.path.join(self.directory, f"{game_id}.log")
+
+    def append(self, game_id, event):
+        with self._lock:
+            # Microsecond clock readings keep sequence numbers rising across restarts and across workers sharing the directory.
+            self._seq = max(self._seq + 1, time.time_ns() // 1000)
+            event = dict(event, seq=self._seq, ts=time.time())
+            self._pending.append((game_id, json.dumps(event, default=_encode, separators=(',', ':')) + '\n'))
+            self.stats['appended'] += 1
+            seq = self._seq
+        self._wakeup.set()
+        return seq
+
+    def games(self):
+        return [name[:-4] for name in os.listdir(self.directory) if name.endswith('.log')]
+
+    def replay(self, game_id):
+        events = _blocking(self._read, game_id)
+        self.stats['replayed'] += len(events)
+        return events
+
+    def _read(self, game_id):
+        # Events at or below the last checkpoint are already in the tables.
+        events = []
+        upto = 0
+        try:
+            with open(self._path(game_id), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Game {game_id}: Ignoring torn journal record")
+                        break
+                    if event.get('type') == CHECKPOINT:
+                        upto = max(upto, event['upto'])
+                    else:
+                        events.append(event)
+        except FileNotFoundError:
+            return []
+        return [event for event in events if event['seq'] > upto]
+
+    def _handle(self, game_id):
+        handle = self._files.get(game_id)
+        if handle is None:
+            if len(self._files) >= MAX_OPEN_FILES:
+                self._files.pop(next(iter(self._files))).close()
+            handle = self._files[game_id] = open(self._path(game_id), 'a', encoding='utf-8')
+        return handle
+
+    def _close(self, game_id):
+        handle = self._files.pop(game_id, None)
+        if handle:
+            handle.close()
+
+    def write_pending(self):
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            fsyncs = _blocking(self._write_batch, batch)
+            self.stats['bytes'] += sum(len(line) for _, line in batch)
+            self.stats['batches'] += 1
+            self.stats['fsyncs'] += fsyncs
+            self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+            return len(batch)
+
+    def _write_batch(self, batch):
+        # Runs off the hub with _io_lock held by the caller, so it must not touch green locks itself.
+        touched = {}
+        for game_id, line in batch:
+            handle = self._handle(game_id)
+            handle.write(line)
+            touched[game_id] = handle
+        for handle in touched.values():
+            handle.flush()
+            os.fsync(handle.fileno())
+        return len(touched)
+
+    def compact(self, game_id, upto_seq):
+        # Called once the relational projection holds everything up to upto_seq; later events stay in the journal.
+        if upto_seq <= self._checkpoints.get(game_id, 0):
+            return False
+        with self._io_lock:
+            self.write_pending()
+            rewritten = _blocking(self._compact_file, game_id, upto_seq)
+        self._checkpoints[game_id] = upto_seq
+        if rewritten is None:
+            return False
+        if rewritten:
+            self.stats['compactions'] += 1
+            return True
+        # Small files keep their lines; the checkpoint rides along with the next group commit.
+        with self._lock:
+            self._pending.append((game_id, json.dumps({'type': CHECKPOINT, 'upto': upto_seq}, separators=(',', ':')) + '\n'))
+            self.stats['checkpoints'] += 1
+        self._wakeup.set()
+        return False
+
+    def _compact_file(self, game_id, upto_seq):
+        path = self._path(game_id)
+        try:
+            if os.path.getsize(path) < self.compact_bytes:
+                return False
+        except FileNotFoundError:
+            return None
+        self._close(game_id)
+        keep = [event for event in self._read(game_id) if event['seq'] > upto_seq]
+        if keep:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for event in keep:
+                    f.write(json.dumps(event, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        else:
+            os.remove(path)
+        return True
+
+    def drop(self, game_id):
+        with self._io_lock:
+            with self._lock:
+                self._pending = [item for item in self._pending if item[0] != game_id]
+            self._checkpoints.pop(game_id, None)
+            _blocking(self._remove_file, game_id)
+
+    def _remove_file(self, game_id):
+        self._close(game_id)
+        try:
+            os.remove(self._path(game_id))
+        except FileNotFoundError:
+            pass
+
+    def run(self):
+        while True:
+            self._wakeup.wait(1.0)
+            self._wakeup.clear()
+            # Let concurrent appends pile up so they share one fsync.
+            time.sleep(self.flush_interval)
+            try:
+                self.write_pending()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error writing game journal: {str(e)}")
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        stats['open_files'] = len(self._files)
+        return stats
@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+class MailboxTask:
+    __slots__ = ('fn', 'args', 'kwargs', 'posted_at', 'done', 'result', 'error')
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.posted_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class GameMailboxes:
+    # One queue per game drained by a single green thread, so a game's events never interleave; games run in parallel.
+    def __init__(self, spawn, context=None):
+        self._spawn = spawn
+        self._context = context or nullcontext
+        self._boxes = {}
+        self._workers = {}
+        self._lock = threading.Lock()
+        self.stats = {'posted': 0, 'processed': 0, 'errors': 0, 'inline': 0, 'max_depth': 0, 'max_wait': 0.0}
+
+    def post(self, game_id, fn, /, *args, **kwargs):
+        task = MailboxTask(fn, args, kwargs)
+        with self._lock:
+            box = self._boxes.get(game_id)
+            start = box is None
+            if start:
+                box = self._boxes[game_id] = deque()
+            box.append(task)
+            self.stats['posted'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], len(box))
+        if start:
+            self._spawn(self._drain, game_id)
+        return task
+
+    def call(self, game_id, fn, /, *args, **kwargs):
+        if self._workers.get(game_id) == threading.get_ident():
+            # Already running on this game's mailbox; queueing would wait on ourselves.
+            self.stats['inline'] += 1
+            return fn(*args, **kwargs)
+        task = self.post(game_id, fn, *args, **kwargs)
+        task.done.wait()
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def _drain(self, game_id):
+        ident = threading.get_ident()
+        self._workers[game_id] = ident
+        try:
+            while True:
+                with self._lock:
+                    box = self._boxes[game_id]
+                    if not box:
+                        del self._boxes[game_id]
+                        del self._workers[game_id]
+                        return
+                    task = box.popleft()
+                wait = time.monotonic() - task.posted_at
+                try:
+                    with self._context():
+                        task.result = task.fn(*task.args, **task.kwargs)
+                except Exception as e:
+                    task.error = e
+                    with self._lock:
+                        self.stats['errors'] += 1
+                    logger.error(f"Game {game_id}: Error in mailbox task {getattr(task.fn, '__name__', task.fn)}: {str(e)}")
+                finally:
+                    with self._lock:
+                        self.stats['processed'] += 1
+                        self.stats['max_wait'] = max(self.stats['max_wait'], round(wait, 3))
+                    task.done.set()
+        finally:
+            if self._workers.get(game_id) == ident:
+                del self._workers[game_id]
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['active'] = len(self._boxes)
+            stats['queued'] = sum(len(box) for box in self._boxes.values())
+        return stats
@@ -0,0 +1,356 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import update
+from models import db, Game, Player
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL = 30.0
+HANDOFF_TIMEOUT = 2.0
+HANDOFF_ATTEMPTS = 2
+
+class LeaseUnavailable(TimeoutError):
+    pass
+
+class TopicProfile:
+    # A player's likes and dislikes, updated per rating; candidates is the catalog minus dislikes, rebuilt only when dislikes change.
+    __slots__ = ('catalog', 'liked', 'disliked', 'candidates')
+
+    def __init__(self, catalog, ratings=()):
+        self.catalog = catalog
+        self.liked = {}
+        self.disliked = set()
+        for name, rating in ratings:
+            self._apply(name, bool(rating))
+        self.candidates = self._build_candidates()
+
+    def _apply(self, name, liked):
+        # liked keeps insertion order with the latest like last, so top() favours recent likes.
+        self.liked.pop(name, None)
+        if liked:
+            self.liked[name] = True
+            self.disliked.discard(name)
+        else:
+            self.disliked.add(name)
+
+    def _build_candidates(self):
+        return tuple(t for t in self.catalog if t not in self.disliked) if self.disliked else self.catalog
+
+    def rate(self, name, liked):
+        was_disliked = name in self.disliked
+        self._apply(name, liked)
+        if was_disliked != (name in self.disliked):
+            self.candidates = self._build_candidates()
+
+    def top(self, limit):
+        return list(reversed(self.liked))[:limit]
+
+    def counts(self):
+        return {'liked': len(self.liked), 'disliked': len(self.disliked), 'candidates': len(self.candidates)}
+
+class PlayerState:
+    __slots__ = ('id', 'username', 'score', 'emoji', 'disconnected', 'sid', 'profile', 'wire', 'unread')
+
+    def __init__(self, id, username, score=0, emoji=None, disconnected=False, sid=None):
+        self.id = id
+        self.username = username
+        self.score = score or 0
+        self.emoji = emoji
+        self.disconnected = bool(disconnected)
+        self.sid = sid
+        self.profile = None
+        self.wire = None
+        self.unread = None
+
+    @classmethod
+    def from_row(cls, player):
+        return cls(player.id, player.username, player.score, player.emoji, player.disconnected, player.sid)
+
+class GameState:
+    __slots__ = ('id', 'host', 'status', 'current_player_index', 'current_question', 'question_start_time', 'last_activity', 'players', 'dirty', 'journal_seq', 'answers', 'saved_answers', 'unsaved_answers_seq', 'last_topic', 'version', 'round')
+
+    def __init__(self, id, host, status='waiting', current_player_index=0, current_question=None, question_start_time=None, last_activity=None, players=None):
+        self.id = id
+        self.host = host
+        self.status = status or 'waiting'
+        self.current_player_index = current_player_index or 0
+        self.current_question = current_question
+        self.question_start_time = question_start_time
+        self.last_activity = last_activity
+        self.players = players or []
+        self.dirty = False
+        self.journal_seq = 0
+        self.last_topic = None
+        self.version = 0
+        # Bumped whenever a question is issued or the game is reset, so work started for one round can tell it is stale.
+        self.round = 0
+        # Answers to the current question by player id, written to the answers table when the round resolves.
+        self.answers = {}
+        self.saved_answers = set()
+        self.unsaved_answers_seq = 0
+
+    @classmethod
+    def from_row(cls, game, players):
+        return cls(game.id, game.host, game.status, game.current_player_index, dict(game.current_question) if game.current_question else None,
+                   game.question_start_time, game.last_activity, [PlayerState.from_row(p) for p in players])
+
+    def player(self, username):
+        for p in self.players:
+            if p.username == username:
+                return p
+        return None
+
+    def player_at(self, index):
+        return self.players[index] if 0 <= index < len(self.players) else None
+
+    def active_players(self):
+        return [p for p in self.players if not p.disconnected]
+
+    def scores(self):
+        return {p.username: p.score for p in self.players}
+
+    def emojis(self):
+        return {p.username: p.emoji for p in self.players}
+
+    def usernames(self):
+        return [p.username for p in self.players]
+
+    def touch(self):
+        self.dirty = True
+
+    def new_round(self):
+        self.round += 1
+        self.answers = {}
+        self.saved_answers = set()
+        self.unsaved_answers_seq = 0
+
+    def all_answered(self):
+        # Matches the old count query: every player, connected or not, has an answer for the question.
+        return len(self.answers) >= len(self.players)
+
+    def apply(self, event):
+        # Journal events carry absolute values, so replaying one the tables already hold is harmless.
+        for field, value in event.get('game', {}).items():
+            if field == 'question_start_time' and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            setattr(self, field, value)
+        for username, fields in event.get('players', {}).items():
+            p = self.player(username)
+            if p is None:
+                p = PlayerState(fields['id'], username)
+                self.players.append(p)
+            for field, value in fields.items():
+                setattr(p, field, value)
+        self.journal_seq = max(self.journal_seq, event.get('seq', 0))
+        self.dirty = True
+
+class GameStateStore:
+    # With a shared backend each game is leased to one worker. Socket events are relayed to the owner; only requests that
+    # must run here ask the owner to flush and hand the game over.
+    def __init__(self, backend=None, worker_id=None, on_load=None, on_flush=None, lease_ttl=LEASE_TTL):
+        self._games = {}
+        self._lock = threading.Lock()
+        self._backend = backend if backend is not None and backend.shared else None
+        self._worker_id = worker_id
+        self._on_load = on_load
+        self._on_flush = on_flush
+        self._lease_ttl = lease_ttl
+        self._lease_checked = {}
+        self.flushes = 0
+        self.flush_errors = 0
+        self.handoffs = 0
+        self.lease_failures = 0
+
+    def _holds_lease(self, game_id):
+        if self._backend is None:
+            return True
+        if time.monotonic() < self._lease_checked.get(game_id, 0):
+            return True
+        if self._backend.claim(game_id, self._worker_id, self._lease_ttl):
+            self._lease_checked[game_id] = time.monotonic() + self._lease_ttl / 3
+            return True
+        self._lease_checked.pop(game_id, None)
+        return False
+
+    def _acquire_lease(self, game_id):
+        for attempt in range(HANDOFF_ATTEMPTS):
+            if self._holds_lease(game_id):
+                return
+            self._backend.publish({'game_id': game_id, 'to': self._worker_id})
+            deadline = time.monotonic() + HANDOFF_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.02)
+                if self._holds_lease(game_id):
+                    return
+            logger.warning(f"Game {game_id}: Owner did not hand the game over within {HANDOFF_TIMEOUT}s (attempt {attempt + 1})")
+        # Loading from the database without the lease would leave two live owners.
+        self.lease_failures += 1
+        raise LeaseUnavailable(f"Game {game_id} is held by another worker")
+
+    def remote_owner(self, game_id):
+        # The worker to relay a socket event to; None when this worker owns the game or nobody does yet.
+        if self._backend is None or not game_id:
+            return None
+        if game_id in self._games and self._holds_lease(game_id):
+            return None
+        owner = self._backend.owner(game_id)
+        return owner if owner and owner != self._worker_id else None
+
+    def _drop_lost(self, state):
+        # Changes made here since the last flush are written before letting go rather than silently lost.
+        self.discard(state.id)
+        if not state.dirty:
+            return
+        try:
+            self.flush(state)
+        except Exception as e:
+            self.flush_errors += 1
+            db.session.rollback()
+            logger.error(f"Game {state.id}: Failed to flush state after losing the lease: {str(e)}")
+
+    def get(self, game_id):
+        if not game_id:
+            return None
+        state = self._games.get(game_id)
+        if state is not None:
+            if self._holds_lease(game_id):
+                return state
+            logger.info(f"Game {game_id}: Lease taken by another worker, dropping local state")
+            self._drop_lost(state)
+        if self._backend is not None:
+            self._acquire_lease(game_id)
+        game = Game.query.filter_by(id=game_id).first()
+        if not game:
+            return None
+        players = Player.query.filter_by(game_id=game_id).order_by(Player.id).all()
+        with self._lock:
+            loaded = game_id not in self._games
+            state = self._games.setdefault(game_id, GameState.from_row(game, players))
+        logger.debug(f"Game {game_id}: Loaded game state into memory with {len(state.players)} players")
+        if loaded and self._on_load:
+            self._on_load(state)
+        return state
+
+    def peek(self, game_id):
+        # For read-only pages: the local copy or the last flushed rows, without taking the lease from the owner.
+        if self._backend is None or not game_id or game_id in self._games:
+            return self.get(game_id)
+        game = Game.query.filter_by(id=game_id).first()
+        if not game:
+            return None
+        return GameState.from_row(game, Player.query.filter_by(game_id=game_id).order_by(Player.id).all())
+
+    def owned(self, game_id):
+        # For background work: the local copy while this worker still holds the lease, never loading or asking for a handoff.
+        state = self._games.get(game_id) if game_id else None
+        if state is None or not self._holds_lease(game_id):
+            return None
+        return state
+
+    def add(self, state):
+        if self._backend is not None:
+            self._backend.claim(state.id, self._worker_id, self._lease_ttl)
+            self._lease_checked[state.id] = time.monotonic() + self._lease_ttl / 3
+        with self._lock:
+            self._games[state.id] = state
+        return state
+
+    def hand_off(self, game_id):
+        state = self.discard(game_id)
+        if state is None:
+            return None
+        try:
+            self.flush(state)
+        finally:
+            self._backend.release(game_id, self._worker_id)
+        self.handoffs += 1
+        logger.info(f"Game {game_id}: Handed game state off to another worker")
+        return state
+
+    def renew_leases(self):
+        for state in self.loaded():
+            self._lease_checked.pop(state.id, None)
+            if not self._holds_lease(state.id):
+                logger.warning(f"Game {state.id}: Lost lease, dropping local state")
+                self._drop_lost(state)
+
+    def discard(self, game_id):
+        self._lease_checked.pop(game_id, None)
+        with self._lock:
+            return self._games.pop(game_id, None)
+
+    def loaded(self):
+        with self._lock:
+            return list(self._games.values())
+
+    def flush(self, state):
+        state.dirty = False
+        journal_seq = state.journal_seq
+        db.session.execute(update(Game).where(Game.id == state.id).values(
+            status=state.status, current_player_index=state.current_player_index,
+            current_question=state.current_question, question_start_time=state.question_start_time))
+        if state.players:
+            db.session.execute(update(Player), [
+                {'id': p.id, 'score': p.score, 'disconnected': p.disconnected, 'sid': p.sid} for p in state.players])
+        db.session.commit()
+        self.flushes += 1
+        if self._on_flush:
+            self._on_flush(state, journal_seq)
+
+    def flush_dirty(self):
+        flushed = 0
+        for state in self.loaded():
+            if not state.dirty:
+                continue
+            try:
+                self.flush(state)
+                flushed += 1
+            except Exception as e:
+                state.dirty = True
+                self.flush_errors += 1
+                db.session.rollback()
+                logger.error(f"Game {state.id}: Failed to flush game state: {str(e)}")
+        return flushed
+
+    def stats(self):
+        states = self.loaded()
+        return {'loaded': len(states), 'dirty': sum(1 for state in states if state.dirty), 'flushes': self.flushes, 'flush_errors': self.flush_errors, 'handoffs': self.handoffs, 'lease_failures': self.lease_failures}
+
+class SessionIndex:
+    # sid -> (game_id, username) and back, so socket routing never scans games or players.
+    def __init__(self):
+        self._by_sid = {}
+        self._by_player = {}
+        self._lock = threading.Lock()
+
+    def bind(self, sid, game_id, username):
+        with self._lock:
+            previous = self._by_player.get((game_id, username))
+            if previous and previous != sid:
+                self._by_sid.pop(previous, None)
+            self._by_sid[sid] = (game_id, username)
+            self._by_player[(game_id, username)] = sid
+
+    def unbind(self, sid):
+        with self._lock:
+            key = self._by_sid.pop(sid, None)
+            if key and self._by_player.get(key) == sid:
+                del self._by_player[key]
+                return key
+            return None
+
+    def lookup(self, sid):
+        return self._by_sid.get(sid)
+
+    def sid_for(self, game_id, username):
+        return self._by_player.get((game_id, username))
+
+    def evict_game(self, game_id):
+        with self._lock:
+            for key in [key for key in self._by_player if key[0] == game_id]:
+                self._by_sid.pop(self._by_player.pop(key), None)
+
+    def __len__(self):
+        return len(self._by_sid)
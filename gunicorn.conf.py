@@ -0,0 +1,14 @@
+import os
+
+# Games live in worker memory unless REDIS_URL gives the workers a shared backend, so a platform-set
+# WEB_CONCURRENCY only takes effect with one.
+workers = int(os.getenv('WEB_CONCURRENCY', '1')) if os.getenv('REDIS_URL') else 1
+worker_class = 'eventlet'
+threads = 50
+timeout = 60
+
+def on_starting(server):
+    if server.cfg.workers > 1 and not os.getenv('REDIS_URL'):
+        raise RuntimeError(f"Refusing to start {server.cfg.workers} workers without REDIS_URL; each would hold its own copy of every game")
+    if os.getenv('WEB_CONCURRENCY', '1') != '1' and not os.getenv('REDIS_URL'):
+        server.log.warning(f"Ignoring WEB_CONCURRENCY={os.getenv('WEB_CONCURRENCY')} without REDIS_URL, running one worker")
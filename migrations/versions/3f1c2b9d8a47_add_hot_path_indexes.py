@@ -0,0 +1,65 @@
+"""add hot path indexes
+
+Revision ID: 3f1c2b9d8a47
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2b9d8a47'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tables predate migrations and are still created by db.create_all(), so every step checks what already exists.
+INDEXES = [
+    ('games', 'ix_games_last_activity', ['last_activity'], False),
+    ('players', 'unique_player_per_game_username', ['game_id', 'username'], True),
+    ('players', 'ix_players_game_id_disconnected', ['game_id', 'disconnected'], False),
+    ('questions', 'ix_questions_game_id_id', ['game_id', 'id'], False),
+    ('questions', 'ix_questions_topic_id_timestamp', ['topic_id', 'timestamp'], False),
+    ('answers', 'unique_answer_per_game_player_question', ['game_id', 'player_id', 'question_id'], True),
+    ('answers', 'ix_answers_game_id_question_id_player_id', ['game_id', 'question_id', 'player_id'], False),
+]
+
+
+def remove_duplicates():
+    # Keep the first player row per (game_id, username) and the latest answer per (game_id, player_id, question_id).
+    duplicate_players = """
+        SELECT id FROM players p WHERE EXISTS (
+            SELECT 1 FROM players q WHERE q.game_id = p.game_id AND q.username = p.username AND q.id < p.id)
+    """
+    op.execute(f"DELETE FROM answers WHERE player_id IN ({duplicate_players})")
+    op.execute(f"DELETE FROM ratings WHERE player_id IN ({duplicate_players})")
+    op.execute(f"DELETE FROM players WHERE id IN (SELECT id FROM ({duplicate_players}) AS duplicates)")
+    op.execute("""
+        DELETE FROM answers WHERE id IN (SELECT id FROM (
+            SELECT a.id FROM answers a WHERE EXISTS (
+                SELECT 1 FROM answers b WHERE b.game_id = a.game_id AND b.player_id = a.player_id
+                AND b.question_id = a.question_id AND b.id > a.id)) AS duplicates)
+    """)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    if {'players', 'answers', 'ratings'} <= tables:
+        remove_duplicates()
+    for table, name, columns, unique in INDEXES:
+        if table not in tables:
+            continue
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, name, columns, unique in reversed(INDEXES):
+        if table in tables and name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
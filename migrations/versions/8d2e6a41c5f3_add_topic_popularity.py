@@ -0,0 +1,51 @@
+"""add topic popularity
+
+Revision ID: 8d2e6a41c5f3
+Revises: 3f1c2b9d8a47
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e6a41c5f3'
+down_revision = '3f1c2b9d8a47'
+branch_labels = None
+depends_on = None
+
+# Mirrors topic_popularity.HALF_LIFE and DECAY_EPOCH; existing ratings are counted as if given now.
+HALF_LIFE_SECONDS = 7 * 24 * 60 * 60
+DECAY_EPOCH = datetime(2026, 1, 1)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    if 'topic_popularity' not in tables:
+        op.create_table(
+            'topic_popularity',
+            sa.Column('topic_name', sa.String(length=255), primary_key=True),
+            sa.Column('likes', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('dislikes', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('score', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        )
+    if 'ix_topic_popularity_score' not in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('topic_popularity')}:
+        op.create_index('ix_topic_popularity_score', 'topic_popularity', ['score'])
+    if {'ratings', 'topics'} <= tables:
+        weight = 2 ** ((datetime.utcnow() - DECAY_EPOCH).total_seconds() / HALF_LIFE_SECONDS)
+        op.execute(sa.text("""
+            INSERT INTO topic_popularity (topic_name, likes, dislikes, score, updated_at)
+            SELECT t.normalized_name, SUM(r.rating), SUM(1 - r.rating), (SUM(r.rating) - SUM(1 - r.rating)) * :weight, CURRENT_TIMESTAMP
+            FROM ratings r JOIN topics t ON t.id = r.topic_id
+            WHERE NOT EXISTS (SELECT 1 FROM topic_popularity p WHERE p.topic_name = t.normalized_name)
+            GROUP BY t.normalized_name
+        """).bindparams(weight=weight))
+
+
+def downgrade():
+    op.drop_index('ix_topic_popularity_score', table_name='topic_popularity')
+    op.drop_table('topic_popularity')
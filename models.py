@@ -12,7 +12,7 @@ class Game(db.Model):
     current_player_index = db.Column(db.Integer, default=0)
     current_question = db.Column(db.JSON)
     question_start_time = db.Column(db.DateTime)
-    last_activity = db.Column(db.DateTime, default=db.func.now())
+    last_activity = db.Column(db.DateTime, default=db.func.now(), index=True)
 
     players = db.relationship('Player', backref='game', lazy=True, cascade='all, delete-orphan')
     questions = db.relationship('Question', backref='game', lazy=True, cascade='all, delete-orphan')
@@ -32,6 +32,11 @@ class Player(db.Model):
     disconnected = db.Column(db.Boolean, default=False)
     sid = db.Column(db.String(120), nullable=True)  # Added for Socket.IO session ID
 
+    __table_args__ = (
+        db.Index('unique_player_per_game_username', 'game_id', 'username', unique=True),
+        db.Index('ix_players_game_id_disconnected', 'game_id', 'disconnected'),
+    )
+
     answers = db.relationship('Answer', backref='player', lazy=True, cascade='all, delete-orphan')
     ratings = db.relationship('Rating', backref='player', lazy=True, cascade='all, delete-orphan')
 
@@ -58,6 +63,11 @@ class Question(db.Model):
     answer_text = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=db.func.now(), nullable=False)  # Added timestamp field
 
+    __table_args__ = (
+        db.Index('ix_questions_game_id_id', 'game_id', 'id'),
+        db.Index('ix_questions_topic_id_timestamp', 'topic_id', 'timestamp'),
+    )
+
     answers = db.relationship('Answer', backref='question', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
@@ -71,6 +81,11 @@ class Answer(db.Model):
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
     answer = db.Column(db.String(255))
 
+    __table_args__ = (
+        db.Index('unique_answer_per_game_player_question', 'game_id', 'player_id', 'question_id', unique=True),
+        db.Index('ix_answers_game_id_question_id_player_id', 'game_id', 'question_id', 'player_id'),
+    )
+
     def __repr__(self):
         return f'<Answer by Player {self.player_id} for Question {self.question_id}>'
 
@@ -87,4 +102,45 @@ class Rating(db.Model):
     )
 
     def __repr__(self):
-        return f'<Rating {"Like" if self.rating else "Dislike"} by Player {self.player_id} for Topic {self.topic_id}>'
\ No newline at end of file
+        return f'<Rating {"Like" if self.rating else "Dislike"} by Player {self.player_id} for Topic {self.topic_id}>'
+
+class BankedQuestion(db.Model):
+    __tablename__ = 'question_bank'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    topic_name = db.Column(db.String(255), nullable=False, index=True)  # Topic.normalized_name, survives topic cleanup
+    question_text = db.Column(db.Text, nullable=False)
+    answer_text = db.Column(db.Text, nullable=False)
+    options = db.Column(db.JSON, nullable=False)
+    explanation = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+    last_used_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+    use_count = db.Column(db.Integer, default=0, nullable=False)
+
+    views = db.relationship('BankedQuestionView', backref='entry', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+
+    def __repr__(self):
+        return f'<BankedQuestion {self.id} for Topic {self.topic_name}>'
+
+class BankedQuestionView(db.Model):
+    __tablename__ = 'question_bank_views'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey('question_bank.id', ondelete='CASCADE'), nullable=False)
+    username = db.Column(db.String(50), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('entry_id', 'username', name='unique_view_per_entry_username'),
+    )
+
+    def __repr__(self):
+        return f'<BankedQuestionView {self.username} saw {self.entry_id}>'
+
+class TopicPopularity(db.Model):
+    __tablename__ = 'topic_popularity'
+    topic_name = db.Column(db.String(255), primary_key=True)  # Topic.normalized_name, survives topic cleanup
+    likes = db.Column(db.Integer, default=0, nullable=False)
+    dislikes = db.Column(db.Integer, default=0, nullable=False)
+    score = db.Column(db.Float, default=0.0, nullable=False, index=True)  # Forward-decayed: divide by decay_weight(now) to read
+    updated_at = db.Column(db.DateTime, default=db.func.now(), nullable=False)
+
+    def __repr__(self):
+        return f'<TopicPopularity {self.topic_name} +{self.likes}/-{self.dislikes}>'
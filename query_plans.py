@@ -0,0 +1,47 @@
+from sqlalchemy import func, select
+from models import db, Game, Player, Question, Answer
+
+SAMPLE_GAME_ID = 'ABCD'
+
+def hot_queries():
+    return [
+        ('round answers', 'answers', select(Answer.player_id, Answer.answer).filter_by(game_id=SAMPLE_GAME_ID, question_id=1)),
+        ('player by username', 'players', select(Player.id).filter_by(game_id=SAMPLE_GAME_ID, username='host')),
+        ('active players', 'players', select(Player.id).filter_by(game_id=SAMPLE_GAME_ID, disconnected=False)),
+        ('prior questions', 'questions', select(Question.question_text, Question.answer_text).filter_by(game_id=SAMPLE_GAME_ID).order_by(Question.id)),
+        ('latest question for topic', 'questions', select(func.max(Question.timestamp)).filter_by(topic_id=1)),
+        ('inactive games', 'games', select(Game.id).filter(Game.last_activity < func.current_timestamp())),
+    ]
+
+def explain(statement):
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    connection = db.session.connection()
+    if dialect.name == 'sqlite':
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    if dialect.name == 'postgresql':
+        # Tiny tables make sequential scans cheapest; turning them off shows whether an index can serve the query.
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+    raise ValueError(f"Query plan check does not support {dialect.name}")
+
+def uses_index(plan, table):
+    for line in plan:
+        if line.startswith(f"SCAN {table}") and 'INDEX' not in line:
+            return False
+        if f"Seq Scan on {table}" in line:
+            return False
+    return True
+
+def check_query_plans():
+    failures = []
+    try:
+        for name, table, statement in hot_queries():
+            plan = explain(statement)
+            ok = uses_index(plan, table)
+            print(f"{'ok  ' if ok else 'SCAN'} {name}: {' | '.join(line.strip() for line in plan)}")
+            if not ok:
+                failures.append(name)
+    finally:
+        db.session.rollback()
+    return failures
@@ -0,0 +1,91 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from models import db, BankedQuestion, BankedQuestionView
+
+logger = logging.getLogger(__name__)
+
+MAX_BANK_SIZE = 5000
+MAX_QUESTIONS_PER_TOPIC = 50
+MAX_ENTRY_AGE = timedelta(days=30)
+CANDIDATES_PER_LOOKUP = 10
+
+bank_stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+def normalize_topic(topic_name):
+    return topic_name.lower().strip()
+
+def take_banked_question(topic_name, usernames, is_excluded=None):
+    topic_name = normalize_topic(topic_name)
+    seen_ids = db.session.query(BankedQuestionView.entry_id).filter(BankedQuestionView.username.in_(usernames))
+    candidates = (BankedQuestion.query
+                  .filter(BankedQuestion.topic_name == topic_name, ~BankedQuestion.id.in_(seen_ids))
+                  .order_by(BankedQuestion.use_count, BankedQuestion.last_used_at)
+                  .limit(CANDIDATES_PER_LOOKUP)
+                  .all())
+    for entry in candidates:
+        question_data = {'question': entry.question_text, 'answer': entry.answer_text, 'options': list(entry.options), 'explanation': entry.explanation}
+        if is_excluded and is_excluded(question_data):
+            continue
+        random.shuffle(question_data['options'])
+        question_data['is_fallback'] = False
+        question_data['bank_id'] = entry.id
+        bank_stats['hits'] += 1
+        logger.debug(f"Question bank hit for topic '{topic_name}': entry {entry.id}")
+        return question_data
+    bank_stats['misses'] += 1
+    return None
+
+def bank_question(topic_name, question_data):
+    topic_name = normalize_topic(topic_name)
+    entry = BankedQuestion(topic_name=topic_name, question_text=question_data['question'], answer_text=question_data['answer'],
+                           options=list(question_data['options']), explanation=question_data.get('explanation'), use_count=0)
+    db.session.add(entry)
+    db.session.commit()
+    bank_stats['stored'] += 1
+    evict_overflow(topic_name)
+    return entry.id
+
+def record_use(entry_id, usernames):
+    # Counted when the question is put in front of players, not when it is fetched or prefetched; the caller commits.
+    entry = db.session.get(BankedQuestion, entry_id)
+    if entry is None:
+        return False
+    entry.use_count += 1
+    entry.last_used_at = datetime.utcnow()
+    seen = {row.username for row in BankedQuestionView.query.filter(BankedQuestionView.entry_id == entry_id, BankedQuestionView.username.in_(usernames))}
+    mark_seen(entry_id, set(usernames) - seen)
+    return True
+
+def mark_seen(entry_id, usernames):
+    for username in set(usernames):
+        db.session.add(BankedQuestionView(entry_id=entry_id, username=username))
+
+def evict_entries(entry_ids):
+    if not entry_ids:
+        return 0
+    BankedQuestionView.query.filter(BankedQuestionView.entry_id.in_(entry_ids)).delete(synchronize_session=False)
+    deleted = BankedQuestion.query.filter(BankedQuestion.id.in_(entry_ids)).delete(synchronize_session=False)
+    db.session.commit()
+    bank_stats['evicted'] += deleted
+    return deleted
+
+def evict_overflow(topic_name):
+    topic_count = BankedQuestion.query.filter_by(topic_name=topic_name).count()
+    if topic_count > MAX_QUESTIONS_PER_TOPIC:
+        stale = (db.session.query(BankedQuestion.id).filter_by(topic_name=topic_name)
+                 .order_by(BankedQuestion.last_used_at).limit(topic_count - MAX_QUESTIONS_PER_TOPIC).all())
+        evict_entries([row.id for row in stale])
+    total = db.session.query(func.count(BankedQuestion.id)).scalar()
+    if total > MAX_BANK_SIZE:
+        stale = db.session.query(BankedQuestion.id).order_by(BankedQuestion.last_used_at).limit(total - MAX_BANK_SIZE).all()
+        evict_entries([row.id for row in stale])
+
+def evict_expired(now=None):
+    threshold = (now or datetime.utcnow()) - MAX_ENTRY_AGE
+    expired = db.session.query(BankedQuestion.id).filter(BankedQuestion.last_used_at < threshold).all()
+    deleted = evict_entries([row.id for row in expired])
+    if deleted:
+        logger.info(f"Evicted {deleted} expired question bank entries")
+    return deleted
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+import google.generativeai as genai
+
+try:
+    import eventlet
+    from eventlet import patcher
+except ImportError:
+    eventlet = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
+MAX_CONCURRENT_GENERATIONS = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+MAX_BACKGROUND_GENERATIONS = int(os.getenv('GEMINI_MAX_BACKGROUND', '2'))
+ATTEMPT_TIMEOUT = float(os.getenv('GEMINI_ATTEMPT_TIMEOUT', '8'))
+TOTAL_BUDGET = float(os.getenv('GEMINI_TOTAL_BUDGET', '20'))
+
+class GenerationTimeout(TimeoutError):
+    pass
+
+@contextmanager
+def cooperative_timeout(seconds):
+    # Under eventlet a green timeout fires on the next yield, which socket I/O always does.
+    if eventlet is not None and patcher.is_monkey_patched('socket'):
+        with eventlet.Timeout(seconds, GenerationTimeout(f"Generation exceeded {seconds:.1f}s")):
+            yield
+    else:
+        yield
+
+class StreamingQuestionParser:
+    # Pulls completed key/value pairs out of the first object of a streamed JSON array. A value is only reported once it
+    # has fully arrived, so a half-written string or list is never mistaken for the real thing.
+    def __init__(self):
+        self.buffer = ''
+        self.fields = {}
+        self._pos = None
+        self._done = False
+        self._decoder = json.JSONDecoder()
+
+    def _skip(self, i, chars=' \t\r\n,'):
+        while i < len(self.buffer) and self.buffer[i] in chars:
+            i += 1
+        return i
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self._pos is None:
+            start = self.buffer.find('{')
+            if start == -1:
+                return self.fields
+            self._pos = start + 1
+        while not self._done:
+            i = self._skip(self._pos)
+            if i >= len(self.buffer):
+                break
+            if self.buffer[i] == '}':
+                self._done = True
+                break
+            try:
+                key, i = self._decoder.raw_decode(self.buffer, i)
+                i = self._skip(i, ' \t\r\n')
+                if i >= len(self.buffer) or self.buffer[i] != ':':
+                    break
+                value, end = self._decoder.raw_decode(self.buffer, self._skip(i + 1, ' \t\r\n'))
+            except json.JSONDecodeError:
+                break
+            # A number or literal at the very end of the buffer may still be growing.
+            if end >= len(self.buffer) and not isinstance(value, (str, list, dict)):
+                break
+            self.fields[key] = value
+            self._pos = end
+        return self.fields
+
+class QuestionClient:
+    # Live calls and background (prefetch) calls share one pool of slots. A freed slot always goes to a waiting live call
+    # first, and background calls never hold more than max_background of them.
+    def __init__(self, model_name=MODEL_NAME, max_concurrency=MAX_CONCURRENT_GENERATIONS, attempt_timeout=ATTEMPT_TIMEOUT, total_budget=TOTAL_BUDGET, max_background=MAX_BACKGROUND_GENERATIONS):
+        self.model_name = model_name
+        self.attempt_timeout = attempt_timeout
+        self.total_budget = total_budget
+        self.max_concurrency = max_concurrency
+        self.max_background = min(max_background, max_concurrency)
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._active = 0
+        self._active_background = 0
+        self._live_waiting = 0
+        self._stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'background_calls': 0, 'succeeded': 0, 'failed': 0, 'timeouts': 0, 'saturated': 0, 'in_flight': 0, 'total_latency': 0.0, 'max_latency': 0.0}
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def deadline(self, budget=None):
+        return time.monotonic() + (budget if budget is not None else self.total_budget)
+
+    def _record(self, **changes):
+        with self._stats_lock:
+            for key, value in changes.items():
+                self.stats[key] += value
+
+    def _slot_free(self, background):
+        if self._active >= self.max_concurrency:
+            return False
+        return not background or (not self._live_waiting and self._active_background < self.max_background)
+
+    def _acquire(self, deadline, background=False):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._record(timeouts=1)
+            raise GenerationTimeout("Question generation budget exhausted")
+        timeout = min(self.attempt_timeout, remaining)
+        give_up = time.monotonic() + timeout
+        with self._slots:
+            if not background:
+                self._live_waiting += 1
+            try:
+                while not self._slot_free(background):
+                    left = give_up - time.monotonic()
+                    if left <= 0:
+                        self._record(saturated=1, timeouts=1)
+                        raise GenerationTimeout(f"No generation slot free within {timeout:.1f}s")
+                    self._slots.wait(left)
+                self._active += 1
+                if background:
+                    self._active_background += 1
+            finally:
+                if not background:
+                    self._live_waiting -= 1
+        self._record(calls=1, in_flight=1, background_calls=int(background))
+        return timeout
+
+    def _release(self, started, background=False):
+        elapsed = time.monotonic() - started
+        with self._slots:
+            self._active -= 1
+            if background:
+                self._active_background -= 1
+            self._slots.notify_all()
+        with self._stats_lock:
+            self.stats['in_flight'] -= 1
+            self.stats['total_latency'] += elapsed
+            self.stats['max_latency'] = max(self.stats['max_latency'], elapsed)
+
+    def generate(self, prompt, deadline, background=False, **kwargs):
+        timeout = self._acquire(deadline, background)
+        started = time.monotonic()
+        try:
+            with cooperative_timeout(timeout):
+                response = self.model.generate_content(prompt, request_options={'timeout': timeout}, **kwargs)
+            self._record(succeeded=1)
+            return response
+        except GenerationTimeout:
+            self._record(timeouts=1)
+            raise
+        except Exception:
+            self._record(failed=1)
+            raise
+        finally:
+            self._release(started, background)
+
+    def stream(self, prompt, deadline, background=False, **kwargs):
+        timeout = self._acquire(deadline, background)
+        started = time.monotonic()
+        try:
+            # The deadline is applied per chunk read so the caller's own work between chunks is never interrupted.
+            with cooperative_timeout(timeout):
+                chunks = iter(self.model.generate_content(prompt, stream=True, request_options={'timeout': timeout}, **kwargs))
+            while True:
+                remaining = started + timeout - time.monotonic()
+                if remaining <= 0:
+                    raise GenerationTimeout(f"Generation exceeded {timeout:.1f}s")
+                with cooperative_timeout(remaining):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk.text
+            self._record(succeeded=1)
+        except GenerationTimeout:
+            self._record(timeouts=1)
+            raise
+        except GeneratorExit:
+            raise
+        except Exception:
+            self._record(failed=1)
+            raise
+        finally:
+            self._release(started, background)
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['avg_latency'] = round(stats['total_latency'] / stats['calls'], 3) if stats['calls'] else 0.0
+        stats['total_latency'] = round(stats['total_latency'], 3)
+        stats['max_latency'] = round(stats['max_latency'], 3)
+        return stats
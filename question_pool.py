@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict, deque
+
+
+class QuestionPrefetchPool:
+    def __init__(self, max_games=200, max_topics_per_game=6, max_questions_per_topic=2):
+        self.max_games = max_games
+        self.max_topics_per_game = max_topics_per_game
+        self.max_questions_per_topic = max_questions_per_topic
+        self._lock = threading.Lock()
+        self._games = OrderedDict()
+        self._inflight = set()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def _game_topics(self, game_id, create=False):
+        topics = self._games.get(game_id)
+        if topics is None and create:
+            topics = OrderedDict()
+            self._games[game_id] = topics
+            while len(self._games) > self.max_games:
+                _, dropped = self._games.popitem(last=False)
+                self.evicted += sum(len(q) for q in dropped.values())
+        if topics is not None:
+            self._games.move_to_end(game_id)
+        return topics
+
+    def claim(self, game_id, topic):
+        with self._lock:
+            topics = self._games.get(game_id)
+            if (game_id, topic) in self._inflight or (topics and topics.get(topic)):
+                return False
+            self._inflight.add((game_id, topic))
+            return True
+
+    def release(self, game_id, topic):
+        with self._lock:
+            self._inflight.discard((game_id, topic))
+
+    def put(self, game_id, topic, question_data):
+        with self._lock:
+            topics = self._game_topics(game_id, create=True)
+            queue = topics.get(topic)
+            if queue is None:
+                queue = deque()
+                topics[topic] = queue
+            topics.move_to_end(topic)
+            if len(queue) >= self.max_questions_per_topic:
+                queue.popleft()
+                self.evicted += 1
+            queue.append(dict(question_data))
+            self.stored += 1
+            while len(topics) > self.max_topics_per_game:
+                _, dropped = topics.popitem(last=False)
+                self.evicted += len(dropped)
+
+    def take(self, game_id, topic):
+        with self._lock:
+            topics = self._games.get(game_id)
+            queue = topics.get(topic) if topics else None
+            if not queue:
+                self.misses += 1
+                return None
+            question_data = queue.popleft()
+            if not queue:
+                del topics[topic]
+            self.hits += 1
+            return question_data
+
+    def has(self, game_id, topic):
+        with self._lock:
+            topics = self._games.get(game_id)
+            return bool(topics and topics.get(topic))
+
+    def evict_game(self, game_id):
+        with self._lock:
+            topics = self._games.pop(game_id, None)
+            if topics:
+                self.evicted += sum(len(q) for q in topics.values())
+            self._inflight = {key for key in self._inflight if key[0] != game_id}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'games': len(self._games),
+                'pooled_questions': sum(len(q) for topics in self._games.values() for q in topics.values()),
+                'inflight': len(self._inflight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'stored': self.stored,
+                'evicted': self.evicted,
+            }
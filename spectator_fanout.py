@@ -0,0 +1,170 @@
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SPECTATOR_EVENT = 'spectator_batch'
+REWATCH_EVENT = 'spectator_rewatch'
+FLUSH_INTERVAL = 0.25
+MAX_IN_FLIGHT = 8
+MAX_LAG = 30.0
+MAX_BATCH_EVENTS = 100
+
+class Spectator:
+    __slots__ = ('sid', 'game_id', 'in_flight', 'lagging_since', 'resync')
+
+    def __init__(self, sid, game_id):
+        self.sid = sid
+        self.game_id = game_id
+        self.in_flight = 0
+        self.lagging_since = None
+        self.resync = True
+
+class SpectatorFanout:
+    # Audiences watch outside the players' rooms, registered on the worker that owns the game. A game's events are batched
+    # and each batch is serialized once; every spectator is sent the same bytes and acks them. A spectator with too many
+    # unacked batches skips ahead and is sent the latest view once it catches up, so players never wait on an audience.
+    def __init__(self, server, namespace='/', flush_interval=FLUSH_INTERVAL):
+        self._server = server
+        self._namespace = namespace
+        self.flush_interval = flush_interval
+        self._spectators = {}
+        self._games = {}
+        self._events = {}
+        self._views = {}
+        self._changed = set()
+        self._lock = threading.RLock()
+        self.stats = {'batches': 0, 'encoded': 0, 'sent': 0, 'acked': 0, 'skipped': 0, 'resyncs': 0, 'evicted': 0, 'truncated': 0, 'handed_off': 0}
+
+    def watched(self, game_id):
+        return game_id in self._games
+
+    def add(self, game_id, sid, view=None):
+        with self._lock:
+            self.remove(sid)
+            spectator = self._spectators[sid] = Spectator(sid, game_id)
+            self._games.setdefault(game_id, {})[sid] = spectator
+            if view is not None:
+                self._views[game_id] = view
+            self._changed.add(game_id)
+
+    def remove(self, sid):
+        with self._lock:
+            spectator = self._spectators.pop(sid, None)
+            if not spectator:
+                return None
+            audience = self._games.get(spectator.game_id)
+            audience.pop(sid, None)
+            if not audience:
+                del self._games[spectator.game_id]
+            return spectator.game_id
+
+    def publish(self, game_id, event, data):
+        if not self.watched(game_id):
+            return
+        with self._lock:
+            events = self._events.setdefault(game_id, [])
+            events.append([event, data])
+            if len(events) > MAX_BATCH_EVENTS:
+                del events[0]
+                self.stats['truncated'] += 1
+
+    def update_view(self, game_id, view):
+        if not self.watched(game_id):
+            return
+        with self._lock:
+            self._views[game_id] = view
+            self._changed.add(game_id)
+
+    def view(self, game_id):
+        return self._views.get(game_id)
+
+    def drop_game(self, game_id):
+        with self._lock:
+            for sid in list(self._games.get(game_id, ())):
+                self.remove(sid)
+            self._events.pop(game_id, None)
+            self._views.pop(game_id, None)
+            self._changed.discard(game_id)
+
+    def hand_off(self, game_id):
+        # The next owner keeps the audience: each spectator is asked to watch again, which reaches whoever owns the game.
+        sids = list(self._games.get(game_id, ()))
+        self.drop_game(game_id)
+        for sid in sids:
+            self._server.emit(REWATCH_EVENT, {'game_id': game_id}, to=sid, namespace=self._namespace)
+        self.stats['handed_off'] += len(sids)
+        return len(sids)
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, {}
+            changed, self._changed = self._changed, set()
+        for game_id in set(events) | changed:
+            batch = {'events': events.get(game_id, [])}
+            if game_id in changed:
+                batch['view'] = self._views.get(game_id)
+            self.deliver(game_id, batch)
+
+    def deliver(self, game_id, batch):
+        with self._lock:
+            audience = list(self._games.get(game_id, {}).values())
+        if not audience:
+            return
+        payload = resync_payload = None
+        now = time.monotonic()
+        for spectator in audience:
+            if spectator.in_flight >= MAX_IN_FLIGHT:
+                spectator.lagging_since = spectator.lagging_since or now
+                self.stats['skipped'] += 1
+                if now - spectator.lagging_since > MAX_LAG:
+                    self.remove(spectator.sid)
+                    self.stats['evicted'] += 1
+                    logger.info(f"Game {game_id}: Dropping spectator {spectator.sid} after {MAX_LAG:.0f}s behind")
+                    self._server.disconnect(spectator.sid, namespace=self._namespace)
+                continue
+            if spectator.resync or spectator.lagging_since:
+                # Whatever it missed is folded into the current view.
+                if resync_payload is None:
+                    resync_payload = self._encode({'events': [], 'view': self._views.get(game_id), 'resync': True})
+                self._send(spectator, resync_payload)
+                spectator.resync = False
+                spectator.lagging_since = None
+                self.stats['resyncs'] += 1
+                continue
+            if payload is None:
+                payload = self._encode(batch)
+            self._send(spectator, payload)
+        self.stats['batches'] += 1
+
+    def _encode(self, batch):
+        # Sent as a binary attachment, so the batch is serialized here once and not again per spectator.
+        self.stats['encoded'] += 1
+        return json.dumps(batch, separators=(',', ':'), default=str).encode()
+
+    def _send(self, spectator, payload):
+        spectator.in_flight += 1
+        self._server.emit(SPECTATOR_EVENT, payload, to=spectator.sid, namespace=self._namespace, callback=lambda *args: self._acked(spectator))
+        self.stats['sent'] += 1
+
+    def _acked(self, spectator):
+        spectator.in_flight = max(spectator.in_flight - 1, 0)
+        self.stats['acked'] += 1
+
+    def run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error fanning out to spectators: {str(e)}")
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['spectators'] = len(self._spectators)
+            stats['games'] = len(self._games)
+            stats['in_flight'] = sum(s.in_flight for s in self._spectators.values())
+        return stats
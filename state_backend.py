@@ -0,0 +1,179 @@
+import json
+import logging
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'trivia'
+KEY_TTL = 24 * 60 * 60
+HANDOFF_CHANNEL = f'{KEY_PREFIX}:handoff'
+
+class InProcessStateBackend:
+    # Per-game counters and recent-value lists for a single worker.
+    shared = False
+
+    def __init__(self):
+        self._counters = {}
+        self._recent = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, game_id, field, amount=1):
+        with self._lock:
+            counters = self._counters.setdefault((name, game_id), {})
+            counters[field] = counters.get(field, 0) + amount
+            return counters[field]
+
+    def count(self, name, game_id, field):
+        with self._lock:
+            return self._counters.get((name, game_id), {}).get(field, 0)
+
+    def reset(self, name, game_id, field):
+        self.put(name, game_id, field, 0)
+
+    def put(self, name, game_id, field, value):
+        with self._lock:
+            self._counters.setdefault((name, game_id), {})[field] = value
+
+    def counts(self, name, game_id):
+        with self._lock:
+            return dict(self._counters.get((name, game_id), {}))
+
+    def push_recent(self, name, game_id, value, limit):
+        with self._lock:
+            values = self._recent.setdefault((name, game_id), [])
+            values.append(value)
+            del values[:-limit]
+
+    def recent(self, name, game_id):
+        with self._lock:
+            return list(self._recent.get((name, game_id), ()))
+
+    def drop_game(self, game_id):
+        with self._lock:
+            for store in (self._counters, self._recent):
+                for key in [key for key in store if key[1] == game_id]:
+                    del store[key]
+
+    def claim(self, game_id, owner, ttl):
+        return True
+
+    def owner(self, game_id):
+        return None
+
+    def release(self, game_id, owner):
+        pass
+
+    def publish(self, message):
+        pass
+
+    def listen(self, callback):
+        pass
+
+class RedisStateBackend:
+    # The same operations over the Redis protocol, plus game leases so one worker owns each game's live state.
+    shared = True
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("REDIS_URL is set but the redis package is not installed")
+        self.url = url
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, *parts):
+        return ':'.join((KEY_PREFIX,) + tuple(str(p) for p in parts))
+
+    def incr(self, name, game_id, field, amount=1):
+        key = self._key(name, game_id)
+        pipe = self._client.pipeline()
+        pipe.hincrby(key, field, amount)
+        pipe.expire(key, KEY_TTL)
+        return pipe.execute()[0]
+
+    def count(self, name, game_id, field):
+        return int(self._client.hget(self._key(name, game_id), field) or 0)
+
+    def reset(self, name, game_id, field):
+        self.put(name, game_id, field, 0)
+
+    def put(self, name, game_id, field, value):
+        key = self._key(name, game_id)
+        pipe = self._client.pipeline()
+        pipe.hset(key, field, value)
+        pipe.expire(key, KEY_TTL)
+        pipe.execute()
+
+    def counts(self, name, game_id):
+        return {field: int(value) for field, value in self._client.hgetall(self._key(name, game_id)).items()}
+
+    def push_recent(self, name, game_id, value, limit):
+        key = self._key(name, game_id)
+        pipe = self._client.pipeline()
+        pipe.rpush(key, value)
+        pipe.ltrim(key, -limit, -1)
+        pipe.expire(key, KEY_TTL)
+        pipe.execute()
+
+    def recent(self, name, game_id):
+        return self._client.lrange(self._key(name, game_id), 0, -1)
+
+    def drop_game(self, game_id):
+        keys = list(self._client.scan_iter(match=self._key('*', game_id)))
+        if keys:
+            self._client.delete(*keys)
+
+    def claim(self, game_id, owner, ttl):
+        key = self._key('owner', game_id)
+        ttl_ms = int(ttl * 1000)
+        if self._client.set(key, owner, nx=True, px=ttl_ms):
+            return True
+        # Renewal runs under WATCH, so a lease that expired and went to another worker in between is never extended.
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if current is not None and current != owner:
+                    return False
+                pipe.multi()
+                pipe.set(key, owner, px=ttl_ms)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def owner(self, game_id):
+        return self._client.get(self._key('owner', game_id))
+
+    def release(self, game_id, owner):
+        key = self._key('owner', game_id)
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) == owner:
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def publish(self, message):
+        self._client.publish(HANDOFF_CHANNEL, json.dumps(message))
+
+    def listen(self, callback):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(HANDOFF_CHANNEL)
+        for message in pubsub.listen():
+            try:
+                callback(json.loads(message['data']))
+            except Exception as e:
+                logger.error(f"Error handling state backend message {message.get('data')}: {str(e)}")
+
+def create_state_backend(url=None):
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        logger.info("Using Redis state backend")
+        return RedisStateBackend(url)
+    return InProcessStateBackend()
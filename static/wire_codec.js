@@ -0,0 +1,96 @@
+// Decoder for the opt-in MessagePack wire format; see wire_codec.py for the server side.
+(function() {
+    // Same tables as EVENT_CODES and COMPACT_FIELDS in wire_codec.py.
+    const EVENT = 'w';
+    const EVENT_CODES = ['player_answered', 'chat_message', 'update_unread_count', 'speaking_status',
+                         'voice_offer', 'voice_answer', 'voice_candidate'];
+    const COMPACT_FIELDS = {
+        player_answered: ['username'],
+        chat_message: ['username', 'message'],
+        update_unread_count: ['count'],
+        speaking_status: ['username', 'speaking'],
+        voice_offer: ['from', 'offer'],
+        voice_answer: ['from', 'answer'],
+        voice_candidate: ['from', 'candidate']
+    };
+    const textDecoder = new TextDecoder();
+
+    function unpack(bytes) {
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let pos = 0;
+
+        function str(length) {
+            const value = textDecoder.decode(bytes.subarray(pos, pos + length));
+            pos += length;
+            return value;
+        }
+        function bin(length) {
+            const value = bytes.slice(pos, pos + length);
+            pos += length;
+            return value;
+        }
+        function array(length) {
+            const value = new Array(length);
+            for (let i = 0; i < length; i++) value[i] = read();
+            return value;
+        }
+        function map(length) {
+            const value = {};
+            for (let i = 0; i < length; i++) {
+                const key = read();
+                value[key] = read();
+            }
+            return value;
+        }
+        function read() {
+            const type = view.getUint8(pos++);
+            if (type <= 0x7f) return type;
+            if (type <= 0x8f) return map(type & 0x0f);
+            if (type <= 0x9f) return array(type & 0x0f);
+            if (type <= 0xbf) return str(type & 0x1f);
+            if (type >= 0xe0) return type - 0x100;
+            let value;
+            switch (type) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: value = view.getUint8(pos); pos += 1; return bin(value);
+                case 0xc5: value = view.getUint16(pos); pos += 2; return bin(value);
+                case 0xc6: value = view.getUint32(pos); pos += 4; return bin(value);
+                case 0xca: value = view.getFloat32(pos); pos += 4; return value;
+                case 0xcb: value = view.getFloat64(pos); pos += 8; return value;
+                case 0xcc: value = view.getUint8(pos); pos += 1; return value;
+                case 0xcd: value = view.getUint16(pos); pos += 2; return value;
+                case 0xce: value = view.getUint32(pos); pos += 4; return value;
+                case 0xcf: value = Number(view.getBigUint64(pos)); pos += 8; return value;
+                case 0xd0: value = view.getInt8(pos); pos += 1; return value;
+                case 0xd1: value = view.getInt16(pos); pos += 2; return value;
+                case 0xd2: value = view.getInt32(pos); pos += 4; return value;
+                case 0xd3: value = Number(view.getBigInt64(pos)); pos += 8; return value;
+                case 0xd9: value = view.getUint8(pos); pos += 1; return str(value);
+                case 0xda: value = view.getUint16(pos); pos += 2; return str(value);
+                case 0xdb: value = view.getUint32(pos); pos += 4; return str(value);
+                case 0xdc: value = view.getUint16(pos); pos += 2; return array(value);
+                case 0xdd: value = view.getUint32(pos); pos += 4; return array(value);
+                case 0xde: value = view.getUint16(pos); pos += 2; return map(value);
+                case 0xdf: value = view.getUint32(pos); pos += 4; return map(value);
+            }
+            throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+        }
+        return read();
+    }
+
+    // Returns the real event name and its payload in the same shape the JSON wire uses.
+    function decode(data) {
+        const bytes = data instanceof ArrayBuffer ? new Uint8Array(data) : new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+        const [code, ...values] = unpack(bytes);
+        const event = EVENT_CODES[code];
+        const fields = COMPACT_FIELDS[event];
+        if (!fields) return { event: event, data: values[0] };
+        const result = {};
+        fields.forEach((field, i) => result[field] = values[i]);
+        return { event: event, data: result };
+    }
+
+    window.WireCodec = { encoding: 'msgpack', event: EVENT, decode: decode };
+})();
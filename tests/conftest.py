@@ -0,0 +1,110 @@
+import eventlet
+eventlet.monkey_patch()
+
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix='trivia-tests-')
+os.environ['GEMINI_API_KEY'] = 'test'
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'trivia.db')}"
+os.environ['GAME_JOURNAL_DIR'] = os.path.join(TEST_DIR, 'journal')
+os.environ.pop('REDIS_URL', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google.generativeai as genai
+
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliet", "kilo", "lima", "mike",
+         "november", "oscar", "papa", "quebec", "romeo", "sierra", "tango", "uniform", "victor", "whiskey", "xray", "yankee", "zulu"]
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    # Stands in for Gemini: every question is distinct, and `delay` holds a call open to exercise the live/fallback race.
+    # A streamed reply pauses `stream_pause` seconds before the first explanation, as a slow model would.
+    delay = 0.0
+    stream_pause = 0.0
+    calls = 0
+    _counter = itertools.count()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _question(self):
+        n = next(self._counter)
+        words = random.Random(n).sample(WORDS, 8)
+        return {'question': f"Q{n}: {' '.join(words)}?", 'answer': f"Answer{n}", 'options': [f"Answer{n}", f"Wrong{n}a", f"Wrong{n}b", f"Wrong{n}c"], 'explanation': f"Because {n}."}
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        FakeModel.calls += 1
+        if FakeModel.delay:
+            time.sleep(FakeModel.delay)
+        match = re.search(r'JSON array of (\d+)', prompt)
+        text = json.dumps([self._question() for _ in range(int(match.group(1)))] if match else self._question())
+        if stream:
+            return self._stream(text)
+        return FakeChunk(text)
+
+    def _stream(self, text):
+        pause = text.index('"explanation"')
+        yield FakeChunk(text[:pause])
+        if FakeModel.stream_pause:
+            time.sleep(FakeModel.stream_pause)
+        for i in range(pause, len(text), 40):
+            yield FakeChunk(text[i:i + 40])
+
+genai.GenerativeModel = FakeModel
+
+@pytest.fixture(scope='session')
+def trivia():
+    import app as trivia_app
+    return trivia_app
+
+@pytest.fixture(autouse=True)
+def reset_fake_model():
+    FakeModel.delay = FakeModel.stream_pause = 0.0
+    yield
+    FakeModel.delay = FakeModel.stream_pause = 0.0
+
+@pytest.fixture
+def join(trivia):
+    sockets = []
+
+    def join(username, game_id=None, **kwargs):
+        http = trivia.app.test_client()
+        if game_id is None:
+            response = http.post('/create_game', data={'username': username})
+            game_id = response.headers['Location'].rsplit('/', 1)[1]
+        else:
+            http.post('/join_game', data={'username': username, 'game_id': game_id})
+        sock = trivia.socketio.test_client(trivia.app, flask_test_client=http, **kwargs)
+        sock.emit('join_game_room', {'game_id': game_id, 'username': username})
+        sockets.append(sock)
+        return http, sock, game_id
+
+    yield join
+    for sock in sockets:
+        if sock.is_connected():
+            sock.disconnect()
+
+def received(sock):
+    return [(event['name'], event['args'][0] if event['args'] else None) for event in sock.get_received()]
+
+def wait_for(sock, name, timeout=5):
+    seen = []
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        seen += received(sock)
+        if any(event == name for event, _ in seen):
+            return seen
+        eventlet.sleep(0.02)
+    raise AssertionError(f"{name} not received; got {[event for event, _ in seen]}")
@@ -0,0 +1,39 @@
+import threading
+import time
+
+from deadline_scheduler import DeadlineScheduler
+
+def start(scheduler):
+    threading.Thread(target=scheduler.run, daemon=True).start()
+
+def test_deadlines_fire_in_order_and_rescheduling_replaces():
+    fired = []
+    scheduler = DeadlineScheduler(lambda fn, *args: fn(*args), max_idle_wait=0.05)
+    start(scheduler)
+    scheduler.schedule('G2', 0.06, fired.append, 'G2')
+    scheduler.schedule('G1', 0.02, fired.append, 'G1-old')
+    scheduler.schedule('G1', 0.03, fired.append, 'G1')
+    time.sleep(0.2)
+    assert fired == ['G1', 'G2']
+    stats = scheduler.snapshot()
+    assert stats['fired'] == 2 and stats['cancelled'] == 1 and stats['pending'] == 0
+
+def test_cancelled_deadline_never_fires():
+    fired = []
+    scheduler = DeadlineScheduler(lambda fn, *args: fn(*args), max_idle_wait=0.05)
+    start(scheduler)
+    scheduler.schedule('G1', 0.03, fired.append, 'G1')
+    assert scheduler.pending('G1')
+    assert scheduler.cancel('G1') is True
+    assert scheduler.cancel('G1') is False
+    time.sleep(0.1)
+    assert fired == [] and not scheduler.pending('G1')
+
+def test_dispatch_errors_are_counted():
+    def spawn(fn, *args):
+        raise RuntimeError('pool closed')
+    scheduler = DeadlineScheduler(spawn, max_idle_wait=0.05)
+    start(scheduler)
+    scheduler.schedule('G1', 0.0, print)
+    time.sleep(0.1)
+    assert scheduler.snapshot()['errors'] == 1
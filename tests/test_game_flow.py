@@ -0,0 +1,69 @@
+from conftest import FakeModel, received, wait_for
+
+def test_reset_game_returns_to_lobby(trivia, join):
+    alice_http, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    alice.emit('start_game', {'game_id': game_id, 'username': 'alice'})
+    wait_for(bob, 'game_started')
+    response = alice_http.post(f'/reset_game/{game_id}')
+    assert response.status_code == 200
+    wait_for(bob, 'game_reset')
+    with trivia.app.app_context():
+        assert trivia.game_states.get(game_id).status == 'waiting'
+
+def test_chat_is_delivered_to_the_room(trivia, join):
+    _, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    received(bob)
+    alice.emit('send_chat_message', {'game_id': game_id, 'username': 'alice', 'message': 'hi'})
+    events = wait_for(bob, 'chat_message')
+    assert ('chat_message', {'username': 'alice', 'message': 'hi'}) in events
+
+def test_round_is_scored_once_everyone_answers(trivia, join):
+    _, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    alice.emit('start_game', {'game_id': game_id, 'username': 'alice'})
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Science'})
+    wait_for(alice, 'question_ready')
+    alice.emit('submit_answer', {'game_id': game_id, 'username': 'alice', 'answer': 'A'})
+    bob.emit('submit_answer', {'game_id': game_id, 'username': 'bob', 'answer': 'B'})
+    results = [data for event, data in wait_for(bob, 'round_results') if event == 'round_results'][0]
+    assert set(results['player_answers']) == {'alice', 'bob'}
+    assert results['next_player'] == 'bob'
+
+def test_prefetch_is_capped_and_counted_only_when_served(trivia, join):
+    from models import BankedQuestion, BankedQuestionView
+    _, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    alice.emit('start_game', {'game_id': game_id, 'username': 'alice'})
+    wait_for(bob, 'game_started')
+    with trivia.app.app_context():
+        topics = trivia.get_prefetch_topics(game_id, 'alice')
+        assert 0 < len(topics) <= trivia.MAX_PREFETCH_TOPICS
+        trivia.prefetch_questions(game_id, ['prefetched topic'])
+        banked = BankedQuestion.query.filter_by(topic_name='prefetched topic').all()
+        assert banked and all(entry.use_count == 0 for entry in banked)
+        assert BankedQuestionView.query.filter(BankedQuestionView.entry_id.in_([entry.id for entry in banked])).count() == 0
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'prefetched topic'})
+    wait_for(bob, 'question_ready')
+    with trivia.app.app_context():
+        bank_id = trivia.game_states.get(game_id).current_question['bank_id']
+        assert trivia.db.session.get(BankedQuestion, bank_id).use_count == 1
+        assert {view.username for view in BankedQuestionView.query.filter_by(entry_id=bank_id)} == {'alice', 'bob'}
+
+def test_prefetch_stops_once_the_game_is_handed_off(trivia, join, monkeypatch):
+    _, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    alice.emit('start_game', {'game_id': game_id, 'username': 'alice'})
+    wait_for(bob, 'game_started')
+    # Without a shared backend a handoff just lets go of the local state.
+    monkeypatch.setattr(trivia.game_states, 'hand_off', trivia.game_states.discard)
+    trivia.question_pool.put(game_id, 'handoff topic', {'question': 'q'})
+    with trivia.app.app_context():
+        trivia.game_mailboxes.call(game_id, trivia.hand_off_game, game_id)
+        assert not trivia.question_pool.has(game_id, 'handoff topic')
+        calls = FakeModel.calls
+        trivia.prefetch_questions(game_id, ['another handoff topic'])
+        assert FakeModel.calls == calls
+        assert not trivia.question_pool.has(game_id, 'another handoff topic')
+        assert game_id not in {state.id for state in trivia.game_states.loaded()}
@@ -0,0 +1,56 @@
+import os
+
+from game_journal import GameJournal
+
+def test_appends_are_group_committed_and_replayed(tmp_path):
+    journal = GameJournal(str(tmp_path))
+    seqs = [journal.append('G1', {'type': 'answer_submitted', 'n': i}) for i in range(5)]
+    journal.append('G2', {'type': 'joined'})
+    assert seqs == sorted(seqs)
+    assert journal.write_pending() == 6
+    stats = journal.snapshot()
+    assert stats['batches'] == 1 and stats['fsyncs'] == 2
+    assert [event['n'] for event in journal.replay('G1')] == list(range(5))
+    assert sorted(journal.games()) == ['G1', 'G2']
+
+def test_small_journal_is_checkpointed_not_rewritten(tmp_path):
+    journal = GameJournal(str(tmp_path))
+    seqs = [journal.append('G1', {'type': 'answer_submitted', 'n': i}) for i in range(4)]
+    journal.write_pending()
+    size = os.path.getsize(tmp_path / 'G1.log')
+    assert journal.compact('G1', seqs[1]) is False
+    journal.write_pending()
+    assert os.path.getsize(tmp_path / 'G1.log') > size
+    assert [event['n'] for event in journal.replay('G1')] == [2, 3]
+    assert journal.snapshot()['compactions'] == 0
+    # Nothing new since the last checkpoint: no further writes.
+    assert journal.compact('G1', seqs[1]) is False
+    assert journal.snapshot()['pending'] == 0
+
+def test_large_journal_is_rewritten_past_threshold(tmp_path):
+    journal = GameJournal(str(tmp_path), compact_bytes=512)
+    seqs = [journal.append('G1', {'type': 'answer_submitted', 'n': i, 'pad': 'x' * 40}) for i in range(20)]
+    journal.write_pending()
+    assert journal.compact('G1', seqs[17]) is True
+    assert os.path.getsize(tmp_path / 'G1.log') < 512
+    assert [event['n'] for event in journal.replay('G1')] == [18, 19]
+    journal.append('G1', {'type': 'joined'})
+    journal.write_pending()
+    assert [event['type'] for event in journal.replay('G1')] == ['answer_submitted', 'answer_submitted', 'joined']
+
+def test_torn_tail_is_ignored(tmp_path):
+    journal = GameJournal(str(tmp_path))
+    journal.append('G1', {'type': 'joined'})
+    journal.write_pending()
+    with open(tmp_path / 'G1.log', 'a') as f:
+        f.write('{"type": "answ')
+    assert [event['type'] for event in journal.replay('G1')] == ['joined']
+
+def test_drop_removes_pending_and_file(tmp_path):
+    journal = GameJournal(str(tmp_path))
+    journal.append('G1', {'type': 'joined'})
+    journal.write_pending()
+    journal.append('G1', {'type': 'left'})
+    journal.drop('G1')
+    journal.write_pending()
+    assert journal.games() == [] and journal.replay('G1') == []
@@ -0,0 +1,45 @@
+import eventlet
+import pytest
+
+from game_mailbox import GameMailboxes
+
+def test_tasks_for_one_game_run_in_order():
+    mailboxes = GameMailboxes(eventlet.spawn)
+    seen = []
+
+    def record(value):
+        eventlet.sleep(0.001)
+        seen.append(value)
+
+    tasks = [mailboxes.post('G1', record, i) for i in range(20)]
+    for task in tasks:
+        task.done.wait()
+    assert seen == list(range(20))
+    assert mailboxes.snapshot()['processed'] == 20
+
+def test_games_run_in_parallel():
+    mailboxes = GameMailboxes(eventlet.spawn)
+    gate = eventlet.event.Event()
+    blocked = mailboxes.post('G1', gate.wait)
+    assert mailboxes.call('G2', lambda: 'other game') == 'other game'
+    gate.send(None)
+    blocked.done.wait()
+
+def test_call_from_inside_the_mailbox_runs_inline():
+    mailboxes = GameMailboxes(eventlet.spawn)
+    assert mailboxes.call('G1', lambda: mailboxes.call('G1', lambda: 'nested')) == 'nested'
+    assert mailboxes.snapshot()['inline'] == 1
+
+def test_call_reraises_task_errors():
+    mailboxes = GameMailboxes(eventlet.spawn)
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        mailboxes.call('G1', fail)
+    assert mailboxes.snapshot()['errors'] == 1
+
+def test_task_keywords_may_reuse_mailbox_parameter_names():
+    mailboxes = GameMailboxes(eventlet.spawn)
+    assert mailboxes.call('G1', lambda game_id, fn: (game_id, fn), game_id='G9', fn='f') == ('G9', 'f')
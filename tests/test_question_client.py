@@ -0,0 +1,66 @@
+import eventlet
+import pytest
+
+from question_client import GenerationTimeout, QuestionClient, StreamingQuestionParser
+
+class SlowModel:
+    def __init__(self, delay):
+        self.delay = delay
+        self.started = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.started.append(prompt)
+        eventlet.sleep(self.delay)
+        return prompt
+
+def client_with(model, **kwargs):
+    client = QuestionClient(**kwargs)
+    client._model = model
+    return client
+
+def test_freed_slot_goes_to_live_call_before_background():
+    model = SlowModel(0.05)
+    client = client_with(model, max_concurrency=1, max_background=1)
+    deadline = client.deadline(5)
+    calls = [eventlet.spawn(client.generate, 'live-1', deadline)]
+    eventlet.sleep(0.01)
+    calls.append(eventlet.spawn(client.generate, 'prefetch', deadline, background=True))
+    eventlet.sleep(0.01)
+    calls.append(eventlet.spawn(client.generate, 'live-2', deadline))
+    for call in calls:
+        call.wait()
+    assert model.started == ['live-1', 'live-2', 'prefetch']
+    assert client.snapshot()['background_calls'] == 1
+
+def test_background_calls_are_capped():
+    model = SlowModel(0.05)
+    client = client_with(model, max_concurrency=4, max_background=2)
+    deadline = client.deadline(5)
+    calls = [eventlet.spawn(client.generate, f'prefetch-{i}', deadline, background=True) for i in range(4)]
+    eventlet.sleep(0.02)
+    assert len(model.started) == 2
+    # Live calls still find free slots while prefetch holds its share.
+    assert client.generate('live', deadline) == 'live'
+    for call in calls:
+        call.wait()
+
+def test_waiting_past_the_deadline_fails():
+    model = SlowModel(0.3)
+    client = client_with(model, max_concurrency=1)
+    busy = eventlet.spawn(client.generate, 'live-1', client.deadline(5))
+    eventlet.sleep(0.01)
+    with pytest.raises(GenerationTimeout):
+        client.generate('live-2', client.deadline(0.05))
+    busy.wait()
+    assert client.snapshot()['saturated'] == 1
+
+def test_streaming_parser_reports_only_completed_fields():
+    parser = StreamingQuestionParser()
+    text = '[{"question": "Which planet is red?", "answer": "Mars", "options": ["Mars", "Venus", "Earth", "Jupiter"], "explanation": "Iron oxide."}]'
+    cut = text.index('"Venus"')
+    assert parser.feed(text[:20]) == {}
+    assert parser.feed(text[20:cut]) == {'question': 'Which planet is red?', 'answer': 'Mars'}
+    fields = parser.feed(text[cut:-10])
+    assert fields['options'] == ['Mars', 'Venus', 'Earth', 'Jupiter'] and 'explanation' not in fields
+    assert parser.feed(text[-10:])['explanation'] == 'Iron oxide.'
+    assert parser.buffer == text
@@ -0,0 +1,94 @@
+import time
+
+import eventlet
+
+from models import BankedQuestion
+
+from conftest import FakeModel, received, wait_for
+
+def start_turn(join):
+    alice_http, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    alice.emit('start_game', {'game_id': game_id, 'username': 'alice'})
+    wait_for(bob, 'game_started')
+    return alice_http, alice, bob, game_id
+
+def test_live_question_after_reset_is_dropped(trivia, join):
+    FakeModel.delay = 0.5
+    alice_http, alice, bob, game_id = start_turn(join)
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Volcanoes'})
+    assert alice_http.post(f'/reset_game/{game_id}').status_code == 200
+    wait_for(bob, 'game_reset')
+    eventlet.sleep(1.0)
+    assert 'question_ready' not in [event for event, _ in received(bob)]
+    with trivia.app.app_context():
+        state = trivia.game_states.get(game_id)
+        assert state.status == 'waiting'
+        assert state.current_question is None
+    assert game_id not in trivia.question_races
+
+def test_fallback_deadline_is_cancelled_on_reset(trivia, join, monkeypatch):
+    FakeModel.delay = 1.0
+    monkeypatch.setattr(trivia, 'QUESTION_LATENCY_BUDGET', 0.2)
+    alice_http, alice, bob, game_id = start_turn(join)
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Glaciers'})
+    for _ in range(50):
+        if game_id in trivia.question_races:
+            break
+        eventlet.sleep(0.01)
+    assert trivia.question_deadlines.pending((game_id, 'fallback'))
+    assert alice_http.post(f'/reset_game/{game_id}').status_code == 200
+    assert not trivia.question_deadlines.pending((game_id, 'fallback'))
+    eventlet.sleep(1.5)
+    assert 'question_ready' not in [event for event, _ in received(bob)]
+
+def test_fallback_wins_when_generation_is_slow(trivia, join, monkeypatch):
+    FakeModel.delay = 1.0
+    monkeypatch.setattr(trivia, 'QUESTION_LATENCY_BUDGET', 0.2)
+    _, alice, bob, game_id = start_turn(join)
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Deserts'})
+    wait_for(bob, 'question_ready', timeout=2)
+    with trivia.app.app_context():
+        assert trivia.game_states.get(game_id).current_question['is_fallback']
+    eventlet.sleep(1.2)
+    assert 'question_ready' not in [event for event, _ in received(bob)]
+
+def test_question_is_published_before_its_explanation_streams_in(trivia, join):
+    FakeModel.stream_pause = 1.0
+    _, alice, bob, game_id = start_turn(join)
+    started = time.monotonic()
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Rainforests'})
+    wait_for(bob, 'question_ready')
+    assert time.monotonic() - started < FakeModel.stream_pause
+    with trivia.app.app_context():
+        assert trivia.game_states.get(game_id).current_question['explanation'] == ''
+    eventlet.sleep(FakeModel.stream_pause + 0.3)
+    with trivia.app.app_context():
+        question = trivia.game_states.get(game_id).current_question
+        assert question['explanation'].startswith('Because')
+        assert trivia.db.session.get(BankedQuestion, question['bank_id']).use_count == 1
+
+def failing_stream(*args, **kwargs):
+    raise RuntimeError('model unavailable')
+    yield
+
+def test_failed_generation_serves_fallback_without_an_error(trivia, join, monkeypatch):
+    monkeypatch.setattr(trivia.question_client, 'stream', failing_stream)
+    _, alice, bob, game_id = start_turn(join)
+    received(alice)
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Tundra'})
+    events = wait_for(alice, 'question_ready', timeout=2)
+    assert 'error' not in [event for event, _ in events]
+    with trivia.app.app_context():
+        assert trivia.game_states.get(game_id).current_question['is_fallback']
+    assert game_id not in trivia.question_races
+    assert not trivia.question_deadlines.pending((game_id, 'fallback'))
+
+def test_failed_generation_reports_error_when_bank_is_empty(trivia, join, monkeypatch):
+    monkeypatch.setattr(trivia.question_client, 'stream', failing_stream)
+    monkeypatch.setattr(trivia.fallback_bank, 'pick', lambda topic, is_excluded=None: None)
+    _, alice, bob, game_id = start_turn(join)
+    alice.emit('select_topic', {'game_id': game_id, 'username': 'alice', 'topic': 'Savanna'})
+    wait_for(alice, 'error', timeout=2)
+    assert game_id not in trivia.question_races
+    assert not trivia.question_deadlines.pending((game_id, 'fallback'))
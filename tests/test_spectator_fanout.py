@@ -0,0 +1,106 @@
+import json
+
+import spectator_fanout
+from spectator_fanout import REWATCH_EVENT, SPECTATOR_EVENT, SpectatorFanout
+
+from conftest import wait_for
+
+class FakeServer:
+    def __init__(self):
+        self.sent = []
+        self.disconnected = []
+
+    def emit(self, event, data, to=None, namespace=None, callback=None):
+        self.sent.append((event, data, to, callback))
+
+    def disconnect(self, sid, namespace=None):
+        self.disconnected.append(sid)
+
+    def batches(self, sid):
+        return [json.loads(data) for event, data, to, _ in self.sent if event == SPECTATOR_EVENT and to == sid]
+
+    def ack_all(self):
+        for _, _, _, callback in self.sent:
+            if callback:
+                callback()
+        self.sent = []
+
+def test_batch_is_encoded_once_for_every_spectator():
+    server = FakeServer()
+    fanout = SpectatorFanout(server)
+    for sid in ('s1', 's2', 's3'):
+        fanout.add('G1', sid, {'players': []})
+    fanout.flush()
+    server.ack_all()
+    fanout.publish('G1', 'chat_message', {'username': 'alice', 'message': 'hi'})
+    fanout.publish('G2', 'chat_message', {'username': 'nobody', 'message': 'unwatched'})
+    fanout.flush()
+    payloads = [data for _, data, _, _ in server.sent]
+    assert len(payloads) == 3 and all(p is payloads[0] for p in payloads)
+    assert json.loads(payloads[0])['events'] == [['chat_message', {'username': 'alice', 'message': 'hi'}]]
+    assert fanout.snapshot()['encoded'] == 2
+
+def test_new_spectator_starts_from_the_view():
+    server = FakeServer()
+    fanout = SpectatorFanout(server)
+    fanout.add('G1', 's1', {'players': ['alice']})
+    fanout.flush()
+    assert server.batches('s1') == [{'events': [], 'view': {'players': ['alice']}, 'resync': True}]
+
+def test_spectator_that_stops_acking_skips_then_resyncs(monkeypatch):
+    server = FakeServer()
+    fanout = SpectatorFanout(server)
+    fanout.add('G1', 'slow', {'round': 0})
+    fanout.add('G1', 'fast', {'round': 0})
+    for i in range(spectator_fanout.MAX_IN_FLIGHT + 3):
+        fanout.publish('G1', 'player_answered', {'username': f'p{i}'})
+        fanout.update_view('G1', {'round': i})
+        fanout.flush()
+        for _, _, to, callback in server.sent:
+            if to == 'fast' and callback:
+                callback()
+    assert len(server.batches('slow')) == spectator_fanout.MAX_IN_FLIGHT
+    assert len(server.batches('fast')) == spectator_fanout.MAX_IN_FLIGHT + 3
+    assert fanout.snapshot()['skipped'] == 3
+    server.ack_all()
+    fanout.update_view('G1', {'round': 99})
+    fanout.flush()
+    assert server.batches('slow') == [{'events': [], 'view': {'round': 99}, 'resync': True}]
+
+def test_spectator_behind_too_long_is_disconnected(monkeypatch):
+    server = FakeServer()
+    fanout = SpectatorFanout(server)
+    fanout.add('G1', 'slow', {})
+    for _ in range(spectator_fanout.MAX_IN_FLIGHT + 1):
+        fanout.update_view('G1', {})
+        fanout.flush()
+    now = spectator_fanout.time.monotonic()
+    monkeypatch.setattr(spectator_fanout.time, 'monotonic', lambda: now + spectator_fanout.MAX_LAG + 1)
+    fanout.update_view('G1', {})
+    fanout.flush()
+    assert server.disconnected == ['slow']
+    assert not fanout.watched('G1')
+
+def test_hand_off_asks_the_audience_to_watch_again():
+    server = FakeServer()
+    fanout = SpectatorFanout(server)
+    fanout.add('G1', 's1')
+    fanout.add('G1', 's2')
+    assert fanout.hand_off('G1') == 2
+    assert sorted(to for event, _, to, _ in server.sent if event == REWATCH_EVENT) == ['s1', 's2']
+    assert not fanout.watched('G1')
+
+def test_spectator_sees_game_events(trivia, join):
+    _, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    watcher = trivia.socketio.test_client(trivia.app)
+    try:
+        watcher.emit('watch_game', {'game_id': game_id})
+        alice.emit('send_chat_message', {'game_id': game_id, 'username': 'alice', 'message': 'hello audience'})
+        trivia.spectators.flush()
+        events = wait_for(watcher, SPECTATOR_EVENT)
+        batches = [json.loads(data) for event, data in events if event == SPECTATOR_EVENT]
+        assert batches[0]['view']['players'] == ['alice', 'bob']
+        assert 'chat_message' not in [event for event, _ in events]
+    finally:
+        watcher.disconnect()
@@ -0,0 +1,194 @@
+import threading
+import time
+
+import pytest
+
+import game_state
+from game_state import GameStateStore, LeaseUnavailable
+from models import Player
+from state_backend import InProcessStateBackend, RedisStateBackend, create_state_backend
+
+from conftest import received, wait_for
+
+class SharedBackend(InProcessStateBackend):
+    # Leases and the message channel of a shared backend, kept in memory.
+    shared = True
+
+    def __init__(self):
+        super().__init__()
+        self.owners = {}
+        self.messages = []
+
+    def claim(self, game_id, owner, ttl):
+        return self.owners.setdefault(game_id, owner) == owner
+
+    def owner(self, game_id):
+        return self.owners.get(game_id)
+
+    def release(self, game_id, owner):
+        if self.owners.get(game_id) == owner:
+            del self.owners[game_id]
+
+    def publish(self, message):
+        self.messages.append(message)
+
+@pytest.fixture
+def redis_server():
+    # A Redis stand-in; each backend made from it is one worker talking to the same server.
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+
+    def connect():
+        backend = create_state_backend('redis://localhost:6379/0')
+        backend._client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        return backend
+    return connect
+
+def test_in_process_counters_and_recent_values():
+    backend = create_state_backend(None)
+    assert not backend.shared
+    assert backend.incr('clicks', 'G1', 'alice') == 1
+    assert backend.incr('clicks', 'G1', 'alice', 2) == 3
+    backend.put('clicks', 'G1', 'bob', 5)
+    assert backend.counts('clicks', 'G1') == {'alice': 3, 'bob': 5}
+    backend.reset('clicks', 'G1', 'alice')
+    assert backend.count('clicks', 'G1', 'alice') == 0
+    for topic in ('a', 'b', 'c', 'd'):
+        backend.push_recent('topics', 'G1', topic, 3)
+    assert backend.recent('topics', 'G1') == ['b', 'c', 'd']
+    backend.drop_game('G1')
+    assert backend.counts('clicks', 'G1') == {} and backend.recent('topics', 'G1') == []
+
+def test_owner_elsewhere_is_reported_instead_of_migrating(trivia, join):
+    _, _, game_id = join('alice')
+    backend = SharedBackend()
+    backend.owners[game_id] = 'w2'
+    with trivia.app.app_context():
+        store = GameStateStore(backend, 'w1')
+        assert store.remote_owner(game_id) == 'w2'
+        assert store.peek(game_id).usernames() == ['alice']
+        assert store.loaded() == [] and backend.messages == []
+        backend.release(game_id, 'w2')
+        assert store.remote_owner(game_id) is None
+        assert store.get(game_id) is not None
+        assert store.remote_owner(game_id) is None
+        assert GameStateStore(backend, 'w2').remote_owner(game_id) == 'w1'
+
+def test_handoff_timeout_fails_instead_of_loading(trivia, join, monkeypatch):
+    monkeypatch.setattr(game_state, 'HANDOFF_TIMEOUT', 0.05)
+    _, _, game_id = join('alice')
+    backend = SharedBackend()
+    backend.owners[game_id] = 'w2'
+    with trivia.app.app_context():
+        store = GameStateStore(backend, 'w1')
+        try:
+            store.get(game_id)
+            assert False, 'loaded a game another worker holds'
+        except LeaseUnavailable:
+            pass
+        assert store.loaded() == []
+        assert len(backend.messages) == game_state.HANDOFF_ATTEMPTS
+        assert store.stats()['lease_failures'] == 1
+
+def test_lost_lease_flushes_dirty_state(trivia, join):
+    _, _, game_id = join('alice')
+    backend = SharedBackend()
+    with trivia.app.app_context():
+        trivia.game_states.flush(trivia.game_states.get(game_id))
+        store = GameStateStore(backend, 'w1')
+        state = store.get(game_id)
+        state.player('alice').score = 7
+        state.touch()
+        backend.owners[game_id] = 'w2'
+        store.renew_leases()
+        assert store.loaded() == []
+        assert Player.query.filter_by(game_id=game_id, username='alice').one().score == 7
+
+def test_socket_events_are_relayed_to_the_owner(trivia, join, monkeypatch):
+    _, alice, game_id = join('alice')
+    _, bob, _ = join('bob', game_id)
+    received(bob)
+    published = []
+    monkeypatch.setattr(trivia.game_states, 'remote_owner', lambda gid: 'w2' if gid == game_id else None)
+    monkeypatch.setattr(trivia.state_backend, 'publish', published.append)
+    alice.emit('send_chat_message', {'game_id': game_id, 'username': 'alice', 'message': 'relayed'})
+    assert 'chat_message' not in [event for event, _ in received(bob)]
+    [message] = published
+    assert message['type'] == 'event' and message['owner'] == 'w2' and message['handler'] == 'handle_chat_message'
+    # Replayed on the owner, which here is this worker again.
+    monkeypatch.setattr(trivia.game_states, 'remote_owner', lambda gid: None)
+    trivia.handle_state_message(dict(message, owner=trivia.WORKER_ID))
+    events = wait_for(bob, 'chat_message')
+    assert ('chat_message', {'username': 'alice', 'message': 'relayed'}) in events
+
+def test_background_lookup_never_pulls_a_game_back(trivia, join):
+    _, _, game_id = join('alice')
+    backend = SharedBackend()
+    with trivia.app.app_context():
+        store = GameStateStore(backend, 'w1')
+        assert store.get(game_id) is not None
+        assert store.owned(game_id) is not None
+        store.hand_off(game_id)
+        backend.owners[game_id] = 'w2'
+        assert store.owned(game_id) is None
+        assert store.loaded() == [] and backend.messages == []
+
+def test_redis_counters_recent_values_and_drop_game(redis_server):
+    backend = redis_server()
+    assert isinstance(backend, RedisStateBackend) and backend.shared
+    assert backend.incr('clicks', 'G1', 'alice') == 1
+    assert backend.incr('clicks', 'G1', 'alice', 2) == 3
+    backend.put('clicks', 'G1', 'bob', 5)
+    backend.incr('clicks', 'G10', 'carol')
+    assert backend.counts('clicks', 'G1') == {'alice': 3, 'bob': 5}
+    backend.reset('clicks', 'G1', 'alice')
+    assert backend.count('clicks', 'G1', 'alice') == 0
+    for topic in ('a', 'b', 'c', 'd'):
+        backend.push_recent('topics', 'G1', topic, 3)
+    assert backend.recent('topics', 'G1') == ['b', 'c', 'd']
+    backend.claim('G1', 'w1', 5)
+    backend.drop_game('G1')
+    assert backend.counts('clicks', 'G1') == {} and backend.recent('topics', 'G1') == []
+    assert backend.owner('G1') is None
+    assert backend.counts('clicks', 'G10') == {'carol': 1}
+
+def test_redis_leases_renew_expire_and_release(redis_server):
+    w1, w2 = redis_server(), redis_server()
+    assert w1.claim('G1', 'w1', 0.2)
+    assert not w2.claim('G1', 'w2', 0.2)
+    assert w2.owner('G1') == 'w1'
+    time.sleep(0.1)
+    assert w1.claim('G1', 'w1', 0.2)
+    time.sleep(0.15)
+    assert w2.owner('G1') == 'w1'
+    w2.release('G1', 'w2')
+    assert w1.owner('G1') == 'w1'
+    w1.release('G1', 'w1')
+    assert w2.owner('G1') is None
+    assert w2.claim('G1', 'w2', 0.05)
+    time.sleep(0.1)
+    # Expired: the next claim wins, and the old owner's renewal does not take it back.
+    assert w1.claim('G1', 'w1', 5)
+    assert not w2.claim('G1', 'w2', 5)
+
+def test_redis_messages_reach_every_listener(redis_server):
+    w1, w2 = redis_server(), redis_server()
+    received = []
+    threading.Thread(target=w2.listen, args=(received.append,), daemon=True).start()
+    deadline = time.monotonic() + 2
+    while not received and time.monotonic() < deadline:
+        w1.publish({'game_id': 'G1', 'to': 'w1'})
+        time.sleep(0.05)
+    assert received and received[0] == {'game_id': 'G1', 'to': 'w1'}
+
+def test_game_moves_between_workers_over_redis(trivia, join, redis_server):
+    _, _, game_id = join('alice')
+    with trivia.app.app_context():
+        first = GameStateStore(redis_server(), 'w1')
+        second = GameStateStore(redis_server(), 'w2')
+        assert first.get(game_id) is not None
+        assert second.remote_owner(game_id) == 'w1'
+        assert second.owned(game_id) is None
+        first.hand_off(game_id)
+        assert second.get(game_id).usernames() == ['alice']
+        assert first.remote_owner(game_id) == 'w2'
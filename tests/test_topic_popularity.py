@@ -0,0 +1,13 @@
+import topic_popularity
+
+def test_only_catalog_topics_become_popular(trivia):
+    catalog = trivia.TOPIC_CATALOG
+    with trivia.app.app_context():
+        for _ in range(3):
+            topic_popularity.record_rating('my cousin steve', True)
+        topic_popularity.record_rating(catalog[0], True)
+        trivia.db.session.commit()
+        topic_popularity._popular['refreshed_at'] = 0.0
+        popular = topic_popularity.popular_topics(catalog)
+    assert catalog[0] in popular
+    assert 'my cousin steve' not in popular
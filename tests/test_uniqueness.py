@@ -0,0 +1,61 @@
+import time
+
+from uniqueness import UniquenessIndex, UniquenessRegistry
+
+PARAPHRASES = [
+    ("Which planet is known as the Red Planet?", "What planet is often called the Red Planet?"),
+    ("What is the largest ocean on Earth?", "Which ocean is the largest on Earth?"),
+    ("How many bones are in the adult human body?", "The adult human body has how many bones?"),
+    ("Who was the first person to walk on the Moon?", "Which person first walked on the Moon?"),
+    ("What is the capital city of Australia?", "Which city is the capital of Australia?"),
+    ("What is the chemical symbol for gold?", "Which chemical symbol stands for gold?"),
+    ("In which year did World War II end?", "World War II ended in which year?"),
+]
+
+DISTINCT = [
+    ("Who painted the Mona Lisa?", "Who painted The Starry Night?"),
+    ("Which planet is known as the Red Planet?", "Which planet has the most moons?"),
+    ("What is the largest ocean on Earth?", "What is the longest river in Africa?"),
+    ("Who wrote Romeo and Juliet?", "Who composed the Moonlight Sonata?"),
+]
+
+def test_paraphrases_are_flagged():
+    for stored, paraphrase in PARAPHRASES:
+        index = UniquenessIndex()
+        index.add(stored, "answer one")
+        assert index.conflict(paraphrase, "answer two") == 'similar_question', (stored, paraphrase)
+
+def test_paraphrase_is_found_among_many_stored_questions():
+    index = UniquenessIndex()
+    for n in range(300):
+        index.add(f"Which element has atomic number {n}?", f"element {n}")
+    index.add("What is the largest ocean on Earth?", "Pacific")
+    started = time.perf_counter()
+    assert index.conflict("Which ocean is the largest on Earth?", "Atlantic") == 'similar_question'
+    assert time.perf_counter() - started < 0.01
+
+def test_distinct_questions_pass():
+    for stored, other in DISTINCT:
+        index = UniquenessIndex()
+        index.add(stored, "answer one")
+        assert index.conflict(other, "answer two") is None, (stored, other)
+
+def test_exact_repeats_and_answers():
+    index = UniquenessIndex()
+    index.add("Who painted the Mona Lisa?", "Leonardo da Vinci")
+    assert index.conflict("Who painted the Mona Lisa", "Raphael") == 'same_question'
+    assert index.conflict("Who sculpted David?", "leonardo  da vinci!") == 'same_answer'
+    assert index.conflict("Who painted The Starry Night?", "Vincent van Gogh") is None
+
+def test_registry_loads_once_and_digests():
+    loads = []
+    def loader(game_id):
+        loads.append(game_id)
+        return [("Who painted the Mona Lisa?", "Leonardo da Vinci")]
+    registry = UniquenessRegistry(loader)
+    registry.add('G1', "What is the largest ocean on Earth?", "Pacific")
+    assert len(registry.get('G1')) == 2 and loads == ['G1']
+    assert "(Answer: Pacific)" in registry.get('G1').digest()
+    registry.evict_game('G1')
+    registry.get('G1')
+    assert loads == ['G1', 'G1']
@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+import wire_codec
+from wire_codec import WIRE_JSON, WIRE_MSGPACK, MeasuredJSON, WireStats
+
+def test_negotiation_falls_back_to_json():
+    assert wire_codec.negotiate('xml') == WIRE_JSON
+    assert wire_codec.negotiate(WIRE_MSGPACK) == (WIRE_MSGPACK if wire_codec.BINARY_AVAILABLE else WIRE_JSON)
+    assert wire_codec.wire_room('G1', WIRE_MSGPACK) == 'G1:msgpack'
+
+def test_compact_events_encode_as_positional_fields():
+    msgpack = pytest.importorskip('msgpack')
+    payload = wire_codec.encode('chat_message', {'username': 'alice', 'message': 'hi'})
+    assert msgpack.unpackb(payload) == [wire_codec.EVENT_CODE['chat_message'], 'alice', 'hi']
+    assert len(payload) < len(json.dumps(['chat_message', {'username': 'alice', 'message': 'hi'}]))
+    assert wire_codec.has_binary_form('chat_message') and not wire_codec.has_binary_form('round_results')
+
+def test_measured_json_records_text_events_only(monkeypatch):
+    stats = WireStats()
+    monkeypatch.setattr(wire_codec, 'wire_stats', stats)
+    text = MeasuredJSON.dumps(['round_results', {'a': 1}])
+    MeasuredJSON.dumps([wire_codec.WIRE_EVENT, {'_placeholder': True}])
+    assert MeasuredJSON.loads(text) == ['round_results', {'a': 1}]
+    snapshot = stats.snapshot()
+    assert list(snapshot) == ['round_results']
+    assert snapshot['round_results'][WIRE_JSON]['messages'] == 1
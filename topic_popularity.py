@@ -0,0 +1,59 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import db, TopicPopularity
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE = timedelta(days=7)
+DECAY_EPOCH = datetime(2026, 1, 1)
+REFRESH_INTERVAL = 60
+POPULAR_TOPICS = 20
+
+popularity_stats = {'ratings': 0, 'refreshes': 0, 'popular': 0}
+_popular = {'names': (), 'refreshed_at': 0.0}
+
+def decay_weight(now=None):
+    # Forward decay: newer ratings are added with larger weights, so stored scores never need rewriting as they age.
+    # Weights double every half-life and stay within float range for ~19 years past DECAY_EPOCH.
+    return 2 ** (((now or datetime.utcnow()) - DECAY_EPOCH).total_seconds() / HALF_LIFE.total_seconds())
+
+def record_rating(topic_name, liked, previous=None):
+    # previous is the rating this player already gave the topic in this game, if any.
+    if previous is not None and bool(previous) == liked:
+        return
+    likes = (1 if liked else 0) - (1 if previous else 0)
+    dislikes = (0 if liked else 1) - (1 if previous is not None and not previous else 0)
+    now = datetime.utcnow()
+    values = {'likes': TopicPopularity.likes + likes, 'dislikes': TopicPopularity.dislikes + dislikes,
+              'score': TopicPopularity.score + (likes - dislikes) * decay_weight(now), 'updated_at': now}
+    statement = update(TopicPopularity).where(TopicPopularity.topic_name == topic_name).values(**values)
+    if not db.session.execute(statement).rowcount:
+        try:
+            with db.session.begin_nested():
+                db.session.add(TopicPopularity(topic_name=topic_name, likes=max(likes, 0), dislikes=max(dislikes, 0),
+                                               score=(likes - dislikes) * decay_weight(now), updated_at=now))
+        except IntegrityError:
+            db.session.execute(statement)
+    popularity_stats['ratings'] += 1
+
+def popular_topics(catalog):
+    # Refreshed from the table at most once per REFRESH_INTERVAL; between refreshes this is a plain read.
+    # Only catalog topics qualify: free-text topics typed into one game are never offered to other players.
+    if time.monotonic() - _popular['refreshed_at'] >= REFRESH_INTERVAL:
+        _popular['refreshed_at'] = time.monotonic()
+        try:
+            rows = (db.session.query(TopicPopularity.topic_name)
+                    .filter(TopicPopularity.score > 0, TopicPopularity.topic_name.in_(catalog))
+                    .order_by(TopicPopularity.score.desc())
+                    .limit(POPULAR_TOPICS)
+                    .all())
+            _popular['names'] = tuple(row.topic_name for row in rows)
+            popularity_stats['refreshes'] += 1
+            popularity_stats['popular'] = len(_popular['names'])
+        except Exception as e:
+            logger.error(f"Failed to refresh topic popularity: {str(e)}")
+            db.session.rollback()
+    return _popular['names']
@@ -0,0 +1,110 @@
+import hashlib
+import re
+import threading
+from collections import deque
+
+SIMILARITY_THRESHOLD = 0.5
+DIGEST_QUESTIONS = 10
+DIGEST_ANSWERS = 30
+
+_STOPWORDS = {'a', 'an', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'by', 'with', 'and', 'or', 'is', 'was', 'are', 'were', 'be',
+              'which', 'what', 'who', 'whom', 'whose', 'when', 'where', 'how', 'this', 'that', 'these', 'those', 'it', 'its',
+              'did', 'does', 'do', 'has', 'have', 'had', 'from', 'as', 'known', 'called', 'name', 'named'}
+_WORD = re.compile(r"[a-z0-9]+")
+_ARTICLE = re.compile(r"^(the|a|an)\s+")
+_SUFFIX = re.compile(r"(ing|ed|es|s)$")
+
+def normalize_answer(answer):
+    text = " ".join(_WORD.findall(answer.lower()))
+    return _ARTICLE.sub("", text)
+
+def _stable_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def _stem(token):
+    return _SUFFIX.sub("", token) if len(token) > 4 else token
+
+def question_shingles(question):
+    # Content words plus unordered neighbour pairs, so "the largest ocean" and "which ocean is the largest" still overlap.
+    tokens = [_stem(t) for t in _WORD.findall(question.lower()) if t not in _STOPWORDS]
+    return set(tokens) | {" ".join(sorted(pair)) for pair in zip(tokens, tokens[1:])}
+
+def question_signature(question):
+    return frozenset(_stable_hash(s) for s in question_shingles(question))
+
+def similarity(sig_a, sig_b):
+    if not sig_a or not sig_b:
+        return 0.0
+    return len(sig_a & sig_b) / len(sig_a | sig_b)
+
+class UniquenessIndex:
+    # A game holds at most a few hundred questions, so a new one is compared exactly against every stored signature.
+    __slots__ = ('answer_hashes', 'question_hashes', 'signatures', 'recent', 'recent_answers', '_lock')
+
+    def __init__(self):
+        self.answer_hashes = set()
+        self.question_hashes = set()
+        self.signatures = []
+        self.recent = deque(maxlen=DIGEST_QUESTIONS)
+        self.recent_answers = deque(maxlen=DIGEST_ANSWERS)
+        self._lock = threading.Lock()
+
+    def add(self, question, answer):
+        signature = question_signature(question)
+        with self._lock:
+            self.answer_hashes.add(_stable_hash(normalize_answer(answer)))
+            self.question_hashes.add(_stable_hash(" ".join(_WORD.findall(question.lower()))))
+            self.signatures.append(signature)
+            self.recent.append((question, answer))
+            self.recent_answers.append(answer)
+
+    def conflict(self, question, answer):
+        signature = question_signature(question)
+        with self._lock:
+            if _stable_hash(normalize_answer(answer)) in self.answer_hashes:
+                return 'same_answer'
+            if _stable_hash(" ".join(_WORD.findall(question.lower()))) in self.question_hashes:
+                return 'same_question'
+            for stored in self.signatures:
+                if similarity(signature, stored) >= SIMILARITY_THRESHOLD:
+                    return 'similar_question'
+        return None
+
+    def digest(self):
+        with self._lock:
+            if not self.recent:
+                return "None"
+            lines = [f"- Question: {q} (Answer: {a})" for q, a in self.recent]
+            older_answers = [a for a in self.recent_answers if a not in {a for _, a in self.recent}]
+        if older_answers:
+            lines.append(f"- Other answers already used: {', '.join(older_answers)}")
+        return "\n".join(lines)
+
+    def __len__(self):
+        return len(self.signatures)
+
+class UniquenessRegistry:
+    def __init__(self, loader):
+        self._loader = loader
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, game_id):
+        index = self._indexes.get(game_id)
+        if index is not None:
+            return index
+        with self._lock:
+            index = self._indexes.get(game_id)
+            if index is None:
+                index = UniquenessIndex()
+                for question, answer in self._loader(game_id):
+                    index.add(question, answer)
+                self._indexes[game_id] = index
+        return index
+
+    def add(self, game_id, question, answer):
+        self.get(game_id).add(question, answer)
+
+    def evict_game(self, game_id):
+        with self._lock:
+            self._indexes.pop(game_id, None)
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+WIRE_JSON = 'json'
+WIRE_MSGPACK = 'msgpack'
+BINARY_AVAILABLE = msgpack is not None
+
+# Every binary message travels as this one short event with the real event as a code, because Socket.IO repeats the
+# event name in a text header next to each binary attachment. Codes index EVENT_CODES; static/wire_codec.js mirrors both tables.
+WIRE_EVENT = 'w'
+BINARY_HEADER_BYTES = len(f'451-["{WIRE_EVENT}",{{"_placeholder":true,"num":0}}]')
+EVENT_CODES = ('player_answered', 'chat_message', 'update_unread_count', 'speaking_status',
+               'voice_offer', 'voice_answer', 'voice_candidate')
+EVENT_CODE = {event: code for code, event in enumerate(EVENT_CODES)}
+# Events listed here travel as positional fields; the rest keep their map.
+COMPACT_FIELDS = {
+    'player_answered': ('username',),
+    'chat_message': ('username', 'message'),
+    'update_unread_count': ('count',),
+    'speaking_status': ('username', 'speaking'),
+    'voice_offer': ('from', 'offer'),
+    'voice_answer': ('from', 'answer'),
+    'voice_candidate': ('from', 'candidate'),
+}
+
+def negotiate(requested):
+    return WIRE_MSGPACK if requested == WIRE_MSGPACK and BINARY_AVAILABLE else WIRE_JSON
+
+def wire_room(game_id, wire):
+    return f"{game_id}:{wire}"
+
+def has_binary_form(event):
+    return BINARY_AVAILABLE and event in EVENT_CODE
+
+class WireStats:
+    # Messages, bytes on the wire and encode time per event and wire format.
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def record(self, event, wire, size, seconds):
+        with self._lock:
+            stats = self._events.setdefault(event, {}).setdefault(wire, {'messages': 0, 'bytes': 0, 'encode_seconds': 0.0})
+            stats['messages'] += 1
+            stats['bytes'] += size
+            stats['encode_seconds'] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {event: {wire: {'messages': s['messages'], 'bytes': s['bytes'],
+                                   'avg_bytes': round(s['bytes'] / s['messages'], 1),
+                                   'avg_encode_us': round(s['encode_seconds'] / s['messages'] * 1e6, 1)}
+                            for wire, s in wires.items()}
+                    for event, wires in self._events.items()}
+
+wire_stats = WireStats()
+
+def encode(event, data):
+    start = time.perf_counter()
+    fields = COMPACT_FIELDS.get(event)
+    payload = msgpack.packb([EVENT_CODE[event]] + ([data.get(field) for field in fields] if fields else [data]), use_bin_type=True)
+    wire_stats.record(event, WIRE_MSGPACK, BINARY_HEADER_BYTES + len(payload), time.perf_counter() - start)
+    return payload
+
+class MeasuredJSON:
+    # Handed to Socket.IO as its json module, so text packets are measured where they are really encoded.
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        start = time.perf_counter()
+        text = json.dumps(obj, *args, **kwargs)
+        if isinstance(obj, list) and obj and isinstance(obj[0], str) and obj[0] != WIRE_EVENT:
+            wire_stats.record(obj[0], WIRE_JSON, len(text) + 2, time.perf_counter() - start)
+        return text
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)